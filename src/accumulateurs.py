@@ -0,0 +1,178 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from ingestion import charger_etat, comparer_instantane, sauvegarder_etat
+from instrumentation import annoter, instrumente
+from quantiles import SketchKLL
+from script import (COLONNES_AJUSTEMENTS, COLONNES_MODELE, GENRES_A_IGNORER,
+                    compacter_donnees, paires_genres, preparer_donnees)
+
+# ==========================================
+# ENTRAÎNEMENT INCRÉMENTAL (SOMMES / EFFECTIFS)
+# ==========================================
+# Le modèle additif ne dépend que des sommes et des effectifs de Score par
+# catégorie : on peut donc l'entraîner par morceaux, l'enrichir avec de
+# nouvelles lignes et fusionner les états calculés par plusieurs workers.
+
+
+def _sommes_par_categorie(cles, scores):
+    groupes = scores.groupby(cles, observed=True)
+    sommes = pd.DataFrame({'somme': groupes.sum(), 'nombre': groupes.count()})
+    # Index texte simple, pour fusionner des morceaux aux catégories différentes
+    sommes.index = sommes.index.astype(object)
+    return sommes
+
+
+class AccumulateurModele:
+    def __init__(self):
+        self.somme = 0.0
+        self.nombre = 0
+        vide = pd.DataFrame({'somme': pd.Series(dtype=float), 'nombre': pd.Series(dtype='int64')})
+        self.categories = {dim: vide.copy() for dim in list(COLONNES_AJUSTEMENTS) + ['adj_genre']}
+        # Distribution des scores (seuils du top X %), fusionnable comme les sommes
+        self.scores = SketchKLL(graine=0)
+
+    def _cumuler(self, dim, nouveau):
+        total = self.categories[dim].add(nouveau, fill_value=0)
+        total['nombre'] = total['nombre'].astype('int64')
+        # Une catégorie dont toutes les lignes ont été retirées disparaît du modèle
+        self.categories[dim] = total[total['nombre'] != 0]
+
+    def ajouter(self, df):
+        """Ajoute des lignes déjà préparées (voir preparer_donnees)."""
+        if df.empty:
+            return self
+        self.somme += float(df['Score'].sum())
+        self.nombre += len(df)
+        self.scores.ajouter(df['Score'])
+        for dim, colonne in COLONNES_AJUSTEMENTS.items():
+            self._cumuler(dim, _sommes_par_categorie(df[colonne], df['Score']))
+        paires = paires_genres(df)
+        self._cumuler('adj_genre', _sommes_par_categorie(paires['genre'], paires['Score']))
+        return self
+
+    def retirer(self, df):
+        """Retire des lignes préparées ajoutées auparavant (lignes supprimées ou modifiées).
+
+        Le sketch des scores ne sait pas retirer de valeurs : l'appelant le reconstruit.
+        """
+        if df.empty:
+            return self
+        self.somme -= float(df['Score'].sum())
+        self.nombre -= len(df)
+        for dim, colonne in COLONNES_AJUSTEMENTS.items():
+            self._cumuler(dim, -_sommes_par_categorie(df[colonne], df['Score']))
+        paires = paires_genres(df)
+        self._cumuler('adj_genre', -_sommes_par_categorie(paires['genre'], paires['Score']))
+        return self
+
+    def fusionner(self, autre):
+        """Combine l'état d'un autre accumulateur (par exemple celui d'un autre worker)."""
+        self.somme += autre.somme
+        self.nombre += autre.nombre
+        self.scores.fusionner(autre.scores)
+        for dim, sommes in autre.categories.items():
+            self._cumuler(dim, sommes)
+        return self
+
+    def vers_modele(self, min_count=2, genres_a_ignorer=GENRES_A_IGNORER):
+        """Produit le même dictionnaire que entrainer_modele."""
+        base_score = self.somme / self.nombre if self.nombre else float('nan')
+        model = {'base_score': base_score}
+        for dim in COLONNES_AJUSTEMENTS:
+            cats = self.categories[dim]
+            ajustements = cats['somme'] / cats['nombre'] - base_score
+            model[dim] = ajustements.where(cats['nombre'] >= min_count, 0.0).to_dict()
+
+        genres = self.categories['adj_genre']
+        genres = genres[~genres.index.isin(genres_a_ignorer)]
+        model['adj_genre'] = (genres['somme'] / genres['nombre'] - base_score).to_dict()
+        model['sketch_scores'] = self.scores
+        return model
+
+    def sauvegarder(self, chemin):
+        pd.to_pickle(self, chemin)
+
+    @staticmethod
+    def charger(chemin):
+        return pd.read_pickle(chemin)
+
+
+def entrainer_en_flux(chemin_csv, taille_chunk=100_000, accumulateur=None):
+    """Entraîne (ou enrichit) un accumulateur en lisant le CSV par morceaux."""
+    if accumulateur is None:
+        accumulateur = AccumulateurModele()
+    lecteur = pd.read_csv(chemin_csv, usecols=lambda c: c in COLONNES_MODELE,
+                          dtype={col: object for col in COLONNES_MODELE}, chunksize=taille_chunk)
+    for chunk in lecteur:
+        accumulateur.ajouter(preparer_donnees(chunk))
+    return accumulateur
+
+
+# ==========================================
+# RAFRAÎCHISSEMENT INCRÉMENTAL D'UN INSTANTANÉ
+# ==========================================
+# L'état enregistré à côté du CSV contient les clés / hash de chaque ligne,
+# l'accumulateur et les lignes préparées (pour pouvoir retirer l'ancienne
+# version d'une ligne modifiée). Un nouvel export n'est préparé et cumulé que
+# pour les lignes ajoutées ou modifiées.
+
+VERSION_INSTANTANE = 1
+
+
+def chemin_instantane(chemin_csv):
+    return os.path.splitext(chemin_csv)[0] + ".instantane.pkl"
+
+
+def _etat_vide():
+    return {'version': VERSION_INSTANTANE, 'cles': np.empty(0, dtype=np.uint64),
+            'hashes': np.empty(0, dtype=np.uint64), 'accumulateur': AccumulateurModele(), 'lignes': None}
+
+
+@instrumente("ingestion")
+def rafraichir_modele(chemin_csv, min_count=2, genres_a_ignorer=GENRES_A_IGNORER,
+                      taille_chunk=100_000, chemin_etat=None):
+    """Met à jour le modèle avec les seules différences entre le CSV et l'instantané précédent.
+
+    Les lignes sont identifiées par anime_id (à défaut par Name). Renvoie
+    (modele, df, stats) ; df contient les lignes préparées de tout l'instantané.
+    """
+    chemin_etat = chemin_etat or chemin_instantane(chemin_csv)
+    etat = charger_etat(chemin_etat)
+    if etat is None or etat.get('version') != VERSION_INSTANTANE:
+        etat = _etat_vide()
+
+    entete = pd.read_csv(chemin_csv, nrows=0).columns
+    colonne_cle = 'anime_id' if 'anime_id' in entete else 'Name'
+    lecteur = pd.read_csv(chemin_csv, usecols=lambda c: c in COLONNES_MODELE or c == colonne_cle,
+                          dtype=object, chunksize=taille_chunk)
+    differences = comparer_instantane(lecteur, colonne_cle, etat['cles'], etat['hashes'])
+    stats = differences.stats()
+    annoter(**stats)
+
+    accumulateur, lignes = etat['accumulateur'], etat['lignes']
+    a_retirer = differences.a_retirer()
+    if lignes is not None and len(a_retirer):
+        anciennes = np.isin(lignes['_cle'].to_numpy(dtype=np.uint64), a_retirer)
+        accumulateur.retirer(lignes[anciennes])
+        lignes = lignes[~anciennes]
+        accumulateur.scores = SketchKLL(graine=0).ajouter(lignes['Score'])
+
+    if len(differences.lignes):
+        nouvelles = differences.lignes
+        if colonne_cle not in COLONNES_MODELE:
+            nouvelles = nouvelles.drop(columns=[colonne_cle])
+        nouvelles = preparer_donnees(nouvelles).drop(columns=['Premiered'], errors='ignore')
+        accumulateur.ajouter(nouvelles)
+        lignes = nouvelles if lignes is None else pd.concat([lignes, nouvelles], ignore_index=True)
+        lignes = compacter_donnees(lignes.reset_index(drop=True))
+
+    if lignes is None:
+        lignes = compacter_donnees(preparer_donnees(pd.DataFrame(columns=COLONNES_MODELE + ['_cle'])))
+
+    if stats['inserees'] or stats['modifiees'] or stats['supprimees'] or etat['lignes'] is None:
+        etat.update(cles=differences.cles, hashes=differences.hashes, accumulateur=accumulateur, lignes=lignes)
+        sauvegarder_etat(etat, chemin_etat)
+    return accumulateur.vers_modele(min_count, genres_a_ignorer), lignes, stats
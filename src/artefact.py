@@ -0,0 +1,99 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from quantiles import SketchKLL
+
+# ==========================================
+# ARTEFACT DU MODÈLE ADDITIF
+# ==========================================
+# Le modèle est stocké dans un fichier .npz : le score de base puis, pour
+# chaque dimension, le tableau des catégories (leur position sert de code)
+# et le tableau des ajustements correspondants, plus le sketch de quantiles
+# des scores d'entraînement (seuils du top X %). Ce module ne dépend que de
+# NumPy, pour que d'autres outils puissent noter des profils sans pandas.
+
+VERSION_ARTEFACT = 2
+DIMENSIONS = ['adj_studio', 'adj_season', 'adj_type', 'adj_source', 'adj_rating', 'adj_genre']
+
+
+def chemin_artefact(chemin_csv):
+    return os.path.splitext(chemin_csv)[0] + ".modele.npz"
+
+
+def empreinte_csv(chemin_csv, taille_bloc=1 << 20):
+    """Hash SHA-256 du contenu du CSV source."""
+    h = hashlib.sha256()
+    with open(chemin_csv, 'rb') as f:
+        for bloc in iter(lambda: f.read(taille_bloc), b""):
+            h.update(bloc)
+    return h.hexdigest()
+
+
+def cle_entrainement(sha_csv, min_count, genres_a_ignorer):
+    """Clé de l'artefact : hash du CSV + paramètres d'entraînement."""
+    parametres = json.dumps([VERSION_ARTEFACT, sha_csv, min_count, sorted(genres_a_ignorer)])
+    return hashlib.sha256(parametres.encode('utf-8')).hexdigest()
+
+
+def sauvegarder_modele(model, chemin, chemin_csv, min_count, genres_a_ignorer):
+    stat = os.stat(chemin_csv)
+    sha_csv = empreinte_csv(chemin_csv)
+    meta = {
+        'version': VERSION_ARTEFACT,
+        'cle': cle_entrainement(sha_csv, min_count, genres_a_ignorer),
+        'csv_sha256': sha_csv,
+        'csv_taille': stat.st_size,
+        'csv_mtime_ns': stat.st_mtime_ns,
+    }
+
+    tableaux = {
+        'meta': np.array(json.dumps(meta)),
+        'base_score': np.array(model['base_score'], dtype=np.float64),
+    }
+    for dim in DIMENSIONS:
+        tableaux[dim + '_cles'] = np.array(list(model[dim].keys()), dtype=str)
+        tableaux[dim + '_valeurs'] = np.array(list(model[dim].values()), dtype=np.float64)
+    if model.get('sketch_scores') is not None:
+        for cle, valeur in model['sketch_scores'].etat().items():
+            tableaux['sketch_' + cle] = np.asarray(valeur)
+
+    # Écriture atomique : un artefact à moitié écrit ne doit jamais être relu
+    temporaire = chemin + ".tmp"
+    with open(temporaire, 'wb') as f:
+        np.savez(f, **tableaux)
+    os.replace(temporaire, chemin)
+
+
+def charger_modele(chemin, chemin_csv, min_count, genres_a_ignorer):
+    """Recharge le modèle si l'artefact correspond au CSV et aux paramètres, sinon None."""
+    if not os.path.exists(chemin):
+        return None
+    try:
+        with np.load(chemin, allow_pickle=False) as donnees:
+            meta = json.loads(str(donnees['meta']))
+            if meta.get('version') != VERSION_ARTEFACT:
+                return None
+
+            # Si taille et date sont inchangées, on évite de re-hasher le CSV
+            stat = os.stat(chemin_csv)
+            if stat.st_size == meta['csv_taille'] and stat.st_mtime_ns == meta['csv_mtime_ns']:
+                sha_csv = meta['csv_sha256']
+            else:
+                sha_csv = empreinte_csv(chemin_csv)
+            if meta['cle'] != cle_entrainement(sha_csv, min_count, genres_a_ignorer):
+                return None
+
+            model = {'base_score': float(donnees['base_score'])}
+            for dim in DIMENSIONS:
+                cles = donnees[dim + '_cles'].tolist()
+                valeurs = donnees[dim + '_valeurs'].tolist()
+                model[dim] = dict(zip(cles, valeurs))
+            if 'sketch_valeurs' in donnees.files:
+                model['sketch_scores'] = SketchKLL.depuis_etat(
+                    donnees['sketch_k'], donnees['sketch_n'], donnees['sketch_valeurs'], donnees['sketch_niveaux'])
+            return model
+    except (OSError, ValueError, KeyError):
+        return None
@@ -0,0 +1,254 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from donnees_synthetiques import generer_anime_dataset, generer_popular_anime
+from modele_ols import ajuster_ols_creux, matrices_ols, preparer_donnees_ols
+from nettoyage import nettoyer_csv
+from script import (charger_et_preparer_donnees, chemin_cache_donnees, entrainer_modele, predire_note,
+                    predire_notes_batch, premier_genre, preparer_dashboard)
+
+# ====================================================================
+# BENCHMARK DES ÉTAPES (CHARGEMENT, NETTOYAGE, ENTRAÎNEMENT, PRÉDICTION)
+# ====================================================================
+# Pour chaque taille, des CSV synthétiques sont générés puis chaque étape est
+# chronométrée. La mémoire est mesurée sur d'autres exécutions, pour ne pas
+# fausser le temps : pic tracemalloc (allocations Python seulement), puis
+# hausse du pic de mémoire résidente (RSS) de l'étape rejouée seule dans un
+# interpréteur neuf, qui compte aussi les allocations natives (tampons du
+# lecteur CSV, colonnes Arrow...).
+
+TAILLES_PAR_DEFAUT = [10_000, 100_000, 1_000_000, 10_000_000]
+LIGNES_PREDICTION_UNITAIRE = 10_000
+
+# Démarrage des points d'entrée, mesuré dans un interpréteur neuf : import seul,
+# puis import + chargement du modèle depuis l'artefact déjà en cache
+DOSSIER_SOURCES = os.path.dirname(os.path.abspath(__file__))
+POINTS_ENTREE = ['script', 'serveur', 'scorer_csv', 'modele_compile']
+MODULES_LOURDS = ['pandas', 'numpy', 'scipy', 'matplotlib', 'seaborn', 'statsmodels', 'sklearn', 'tkinter']
+
+# Mesure RSS par /proc (pic remis à zéro par clear_refs) : Linux uniquement
+MESURE_RSS = os.path.exists('/proc/self/clear_refs')
+# Étapes rejouées dans l'interpréteur neuf avant celle dont on mesure la RSS
+PREALABLES = {
+    'entrainement': ['chargement_cache_chaud'],
+    'prediction_unitaire': ['chargement_cache_chaud', 'entrainement'],
+    'prediction_lot': ['chargement_cache_chaud', 'entrainement'],
+    'preparation_dashboard': ['chargement_cache_chaud', 'entrainement'],
+}
+
+
+def _etapes(chemin_additif, chemin_popular, dossier):
+    """Liste (nom, fonction(contexte)) ; chaque fonction range son résultat dans le contexte."""
+    def chargement_froid(ctx):
+        if os.path.exists(chemin_cache_donnees(chemin_additif)):
+            os.remove(chemin_cache_donnees(chemin_additif))
+        ctx['df'] = charger_et_preparer_donnees(chemin_additif)
+
+    def chargement_chaud(ctx):
+        ctx['df'] = charger_et_preparer_donnees(chemin_additif)
+
+    def chargement_sans_cache(ctx):
+        charger_et_preparer_donnees(chemin_additif, utiliser_cache=False)
+
+    def entrainement(ctx):
+        ctx['modele'] = entrainer_modele(ctx['df'])
+
+    def prediction_unitaire(ctx):
+        df = ctx['df'].head(LIGNES_PREDICTION_UNITAIRE)
+        genres = premier_genre(df['Genres'])
+        for ligne, genre in zip(df.itertuples(index=False), genres):
+            predire_note(ctx['modele'], ligne.Studios, ligne.Source, ligne.Type, ligne.Rating,
+                         genre, ligne.season_cleaned)
+
+    def prediction_lot(ctx):
+        df = ctx['df']
+        predire_notes_batch(ctx['modele'], df['Studios'], df['Source'], df['Type'], df['Rating'],
+                            premier_genre(df['Genres']), df['season_cleaned'])
+
+    def dashboard(ctx):
+        # Copie du dictionnaire du modèle : le cache de preparer_dashboard ne sert pas
+        preparer_dashboard(dict(ctx['modele']), ctx['df'])
+
+    def nettoyage(ctx):
+        nettoyer_csv(chemin_popular, os.path.join(dossier, "clean_anime.csv"))
+
+    def ajustement_ols(ctx):
+        df = pd.read_csv(os.path.join(dossier, "clean_anime.csv"))
+        df = preparer_donnees_ols(df[df['score'] <= 10.0].dropna(subset=['season_aired']))
+        X, Y, features = matrices_ols(df)
+        ajuster_ols_creux(X, Y, features)
+
+    return [
+        ('chargement_sans_cache', chargement_sans_cache),
+        ('chargement_cache_froid', chargement_froid),
+        ('chargement_cache_chaud', chargement_chaud),
+        ('entrainement', entrainement),
+        ('prediction_unitaire', prediction_unitaire),
+        ('prediction_lot', prediction_lot),
+        ('preparation_dashboard', dashboard),
+        ('nettoyage', nettoyage),
+        ('ajustement_ols', ajustement_ols),
+    ]
+
+
+def mesurer(fonction, contexte, memoire=True):
+    """Temps (s) d'une exécution et, si demandé, pic mémoire (Mo) d'une seconde exécution."""
+    debut = time.perf_counter()
+    fonction(contexte)
+    secondes = time.perf_counter() - debut
+
+    pic = None
+    if memoire:
+        tracemalloc.start()
+        try:
+            fonction(contexte)
+            pic = tracemalloc.get_traced_memory()[1] / 1e6
+        finally:
+            tracemalloc.stop()
+    return secondes, pic
+
+
+def _memoire_processus(cle):
+    # Ligne VmRSS / VmHWM de /proc/self/status, en Mo
+    with open('/proc/self/status') as f:
+        for ligne in f:
+            if ligne.startswith(cle + ":"):
+                return int(ligne.split()[1]) * 1024 / 1e6
+
+
+def _hausse_rss_etape(chemin_additif, chemin_popular, dossier, nom):
+    # Exécuté dans un interpréteur neuf : préalables, puis l'étape seule
+    import ctypes
+    etapes = dict(_etapes(chemin_additif, chemin_popular, dossier))
+    contexte = {}
+    for prealable in PREALABLES.get(nom, []):
+        etapes[prealable](contexte)
+
+    # Mémoire libérée par les préalables rendue au système (sinon l'étape la
+    # réutiliserait sans faire monter la RSS), puis pic ramené au niveau courant
+    libc = ctypes.CDLL(None)
+    if hasattr(libc, 'malloc_trim'):
+        libc.malloc_trim(0)
+    with open('/proc/self/clear_refs', 'w') as f:
+        f.write("5")
+    debut = _memoire_processus('VmRSS')
+    etapes[nom](contexte)
+    return _memoire_processus('VmHWM') - debut
+
+
+def hausse_rss(nom, chemin_additif, chemin_popular, dossier):
+    """Hausse du pic de mémoire résidente (Mo) d'une étape rejouée dans un processus neuf.
+
+    None si la mesure n'est pas disponible (hors Linux).
+    """
+    if not MESURE_RSS:
+        return None
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+        return pool.submit(_hausse_rss_etape, chemin_additif, chemin_popular, dossier, nom).result()
+
+
+def _importtime(code):
+    """Durée totale (s) de l'interpréteur et temps cumulé (s) des modules lourds importés."""
+    debut = time.perf_counter()
+    sortie = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=DOSSIER_SOURCES,
+                            capture_output=True, text=True, check=True)
+    secondes = time.perf_counter() - debut
+
+    # Lignes "import time: self [us] | cumulative | module" ; seuls les paquets
+    # de premier niveau nous intéressent
+    modules = {}
+    for ligne in sortie.stderr.splitlines():
+        champs = ligne.split("|")
+        if len(champs) != 3 or not ligne.startswith("import time:"):
+            continue
+        nom = champs[2].strip()
+        if nom in MODULES_LOURDS:
+            modules[nom] = round(int(champs[1]) / 1e6, 4)
+    return secondes, modules
+
+
+def mesurer_demarrage(chemin_additif):
+    """Démarrage à froid de chaque point d'entrée, puis du chargement d'un modèle en cache."""
+    resultats = []
+    for module in POINTS_ENTREE:
+        secondes, modules = _importtime(f"import {module}")
+        resultats.append({'point_entree': module, 'secondes': round(secondes, 4), 'modules_lourds': modules})
+        print(f"{'import ' + module:<35} {secondes:9.3f} s  {sorted(modules)}")
+
+    # L'artefact est d'abord créé, pour mesurer le démarrage avec un modèle en cache
+    code = f"from script import obtenir_modele; obtenir_modele({os.path.abspath(chemin_additif)!r})"
+    _importtime(code)
+    secondes, modules = _importtime(code)
+    resultats.append({'point_entree': 'script + modele en cache', 'secondes': round(secondes, 4),
+                      'modules_lourds': modules})
+    print(f"{'script + modèle en cache':<35} {secondes:9.3f} s  {sorted(modules)}")
+    return resultats
+
+
+def lancer(tailles, dossier, memoire=True, graine=0):
+    os.makedirs(dossier, exist_ok=True)
+    resultats = []
+    for taille in tailles:
+        chemin_additif = os.path.join(dossier, f"anime-dataset-{taille}.csv")
+        chemin_popular = os.path.join(dossier, f"popular_anime-{taille}.csv")
+        if not os.path.exists(chemin_additif):
+            generer_anime_dataset(chemin_additif, taille, graine)
+        if not os.path.exists(chemin_popular):
+            generer_popular_anime(chemin_popular, taille, graine)
+
+        contexte = {}
+        for nom, fonction in _etapes(chemin_additif, chemin_popular, dossier):
+            secondes, pic = mesurer(fonction, contexte, memoire)
+            rss = hausse_rss(nom, chemin_additif, chemin_popular, dossier) if memoire else None
+            resultats.append({'taille': taille, 'etape': nom, 'secondes': round(secondes, 4),
+                              'pic_memoire_mo': None if pic is None else round(pic, 2),
+                              'hausse_rss_mo': None if rss is None else round(rss, 2)})
+            print(f"{taille:>10} {nom:<24} {secondes:9.3f} s"
+                  + ("" if pic is None else f" {pic:10.1f} Mo")
+                  + ("" if rss is None else f" {rss:10.1f} Mo RSS"))
+    return resultats
+
+
+def rapport(resultats, demarrage=None):
+    return {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'processeurs': os.cpu_count(),
+        'resultats': resultats,
+        'demarrage': demarrage,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark des étapes du projet sur données synthétiques")
+    parser.add_argument('--tailles', type=int, nargs='+', default=TAILLES_PAR_DEFAUT)
+    parser.add_argument('--dossier', default=None, help="Dossier des CSV générés (temporaire par défaut)")
+    parser.add_argument('--sortie', default="benchmark.json")
+    parser.add_argument('--sans-memoire', action='store_true', help="Ne pas mesurer la mémoire (tracemalloc et RSS)")
+    parser.add_argument('--sans-demarrage', action='store_true', help="Ne pas mesurer le démarrage à froid")
+    args = parser.parse_args()
+
+    dossier = args.dossier or tempfile.mkdtemp(prefix="anime-bench-")
+    resultats = lancer(args.tailles, dossier, memoire=not args.sans_memoire)
+    demarrage = None
+    if not args.sans_demarrage:
+        demarrage = mesurer_demarrage(os.path.join(dossier, f"anime-dataset-{min(args.tailles)}.csv"))
+    with open(args.sortie, 'w', encoding='utf-8') as f:
+        json.dump(rapport(resultats, demarrage), f, indent=2)
+    print(f"Rapport écrit dans {args.sortie}")
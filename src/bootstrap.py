@@ -0,0 +1,155 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from script import COLONNES_AJUSTEMENTS, GENRES_A_IGNORER, charger_et_preparer_donnees, paires_genres
+
+# ====================================================================
+# INTERVALLES DE CONFIANCE BOOTSTRAP DES AJUSTEMENTS
+# ====================================================================
+# Chaque réplicat tire des poids de rééchantillonnage (combien de fois chaque
+# ligne est tirée avec remise). Les moyennes par catégorie s'obtiennent
+# alors par un produit matriciel entre la matrice creuse d'appartenance
+# (catégories x lignes) et un bloc de poids (lignes x réplicats) : aucune
+# boucle Python par réplicat. Les blocs sont répartis dans un pool de processus.
+#
+#   python bootstrap.py anime-dataset-2023.csv --replicats 2000
+
+# Nombre de poids (réplicats x lignes) d'un bloc, pour borner la mémoire
+TAILLE_BLOC = 4_000_000
+
+_TABLES = {}
+
+
+def _codes(valeurs):
+    # Codes entiers et catégories d'une colonne (catégorielle ou texte)
+    if isinstance(valeurs.dtype, pd.CategoricalDtype):
+        return valeurs.cat.codes.to_numpy(), list(valeurs.cat.categories)
+    codes, uniques = pd.factorize(valeurs)
+    return codes, list(uniques)
+
+
+def _appartenance(lignes, codes, n, nb_categories):
+    # Matrice creuse (lignes x catégories) ; les codes -1 (valeur manquante) sont ignorés
+    garde = codes >= 0
+    return sp.csr_matrix((np.ones(garde.sum()), (lignes[garde], codes[garde])), shape=(n, nb_categories))
+
+
+def tables_bootstrap(df, genres_a_ignorer=GENRES_A_IGNORER):
+    """Scores et matrice d'appartenance empilée, seules données utiles aux workers.
+
+    La matrice (2G x lignes) contient d'abord les indicatrices des G catégories
+    de toutes les dimensions, puis les mêmes pondérées par le score : un seul
+    produit par bloc donne ainsi effectifs et sommes de chaque catégorie.
+    """
+    n = len(df)
+    lignes = np.arange(n)
+    blocs, categories, tranches, debut = [], {}, {}, 0
+    for cle, colonne in COLONNES_AJUSTEMENTS.items():
+        codes, categories[cle] = _codes(df[colonne])
+        blocs.append(_appartenance(lignes, codes, n, len(categories[cle])))
+
+    # Un genre compte une fois par ligne : la paire hérite du poids de sa ligne
+    paires = paires_genres(df)
+    paires = paires[~paires['genre'].isin(genres_a_ignorer)]
+    codes, genres = pd.factorize(paires['genre'])
+    categories['adj_genre'] = list(genres)
+    blocs.append(_appartenance(paires['ligne'].to_numpy(), codes, n, len(genres)))
+
+    for cle in categories:
+        tranches[cle] = slice(debut, debut + len(categories[cle]))
+        debut += len(categories[cle])
+    scores = df['Score'].to_numpy(dtype=np.float64)
+    appartenance = sp.hstack(blocs).tocsr()
+    matrice = sp.vstack([appartenance.T, (sp.diags(scores) @ appartenance).T]).tocsr()
+    return {'scores': scores, 'categories': categories, 'tranches': tranches, 'matrice': matrice}
+
+
+def _initialiser_worker(tables):
+    _TABLES.update(tables)
+
+
+def _ajustements_bloc(poids, tables, min_count):
+    """Ajustements de chaque dimension pour un bloc de poids (réplicats x lignes)."""
+    base = (poids @ tables['scores']) / poids.sum(axis=1)
+    # (2G x lignes) @ (lignes x réplicats) -> (réplicats x 2G)
+    produits = (tables['matrice'] @ poids.T).T
+    nb_categories = produits.shape[1] // 2
+    effectifs, sommes = produits[:, :nb_categories], produits[:, nb_categories:]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ajustements = sommes / effectifs - base[:, None]
+
+    resultats = {}
+    for cle, tranche in tables['tranches'].items():
+        adj, eff = ajustements[:, tranche], effectifs[:, tranche]
+        # Catégorie absente du réplicat : pas d'estimation ; sous min_count : nulle, comme à l'entraînement
+        if cle != 'adj_genre':
+            adj[(eff > 0) & (eff < min_count)] = 0.0
+        adj[eff == 0] = np.nan
+        resultats[cle] = adj.astype(np.float32)
+    return resultats
+
+
+def _replicats(tache):
+    graine, nb_replicats, min_count = tache
+    tables = _TABLES
+    n = len(tables['scores'])
+    rng = np.random.default_rng(graine)
+    # Tirage avec remise de n lignes par réplicat, compté par un seul bincount sur tout le bloc
+    tirages = rng.integers(0, n, size=(nb_replicats, n)) + (np.arange(nb_replicats) * n)[:, None]
+    poids = np.bincount(tirages.ravel(), minlength=nb_replicats * n).reshape(nb_replicats, n).astype(np.float64)
+    return _ajustements_bloc(poids, tables, min_count)
+
+
+def intervalles_bootstrap(df, nb_replicats=1000, niveau=0.95, min_count=2,
+                          genres_a_ignorer=GENRES_A_IGNORER, graine=0, workers=None):
+    """Intervalles percentiles {adj_*: {catégorie: (borne basse, borne haute)}}."""
+    if df is None or df.empty:
+        return {}
+    tables = tables_bootstrap(df, genres_a_ignorer)
+    taille = max(1, TAILLE_BLOC // len(df))
+    blocs = [min(taille, nb_replicats - debut) for debut in range(0, nb_replicats, taille)]
+    graines = np.random.SeedSequence(graine).spawn(len(blocs))
+    taches = [(g, b, min_count) for g, b in zip(graines, blocs)]
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_initialiser_worker,
+                             initargs=(tables,)) as pool:
+        resultats = list(pool.map(_replicats, taches))
+
+    alpha = (1.0 - niveau) / 2
+    intervalles = {}
+    for cle, categories in tables['categories'].items():
+        replicats = np.concatenate([r[cle] for r in resultats])
+        # Catégories jamais observées (modalités vides d'une colonne catégorielle) : colonnes toutes NaN
+        observees = ~np.isnan(replicats).all(axis=0)
+        bornes = np.nanquantile(replicats[:, observees], [alpha, 1.0 - alpha], axis=0)
+        categories = [cat for cat, garde in zip(categories, observees) if garde]
+        intervalles[cle] = {cat: (float(bas), float(haut)) for cat, bas, haut in zip(categories, *bornes)}
+    return intervalles
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Intervalles de confiance bootstrap des ajustements")
+    parser.add_argument('csv', nargs='?', default='anime-dataset-2023.csv')
+    parser.add_argument('--replicats', type=int, default=1000)
+    parser.add_argument('--niveau', type=float, default=0.95)
+    parser.add_argument('--min-count', type=int, default=2)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--graine', type=int, default=0)
+    args = parser.parse_args()
+
+    df = charger_et_preparer_donnees(args.csv, afficher_erreurs=False)
+    if df is None:
+        raise SystemExit("Fichier introuvable.")
+    intervalles = intervalles_bootstrap(df, args.replicats, args.niveau, args.min_count,
+                                        graine=args.graine, workers=args.workers)
+    for cle, bornes in intervalles.items():
+        print(f"\n{cle} ({len(bornes)} catégories)")
+        # Les dix intervalles les plus larges : les catégories les moins sûres
+        largeurs = sorted(bornes.items(), key=lambda x: x[1][1] - x[1][0], reverse=True)
+        for cat, (bas, haut) in largeurs[:10]:
+            print(f"  {cat:<40} [{bas:+.3f} ; {haut:+.3f}]")
@@ -0,0 +1,81 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import numpy as np
+
+# ====================================================================
+# TEST DE CHARGE DU SERVICE DE PRÉDICTION
+# ====================================================================
+# Ouvre plusieurs connexions keep-alive vers serveur.py et envoie des
+# requêtes /predire ou /predire/lot en boucle, puis affiche le débit et
+# les latences observées.
+
+STUDIOS = ["Madhouse", "Sunrise", "Wit Studio", "Kyoto Animation", "Bones", "Studio Inconnu"]
+SOURCES = ["Manga", "Original", "Light novel", "Novel"]
+TYPES = ["TV", "Movie", "OVA", "ONA"]
+RATINGS = ["PG-13 - Teens 13 or older", "R - 17+ (violence & profanity)", "G - All Ages"]
+GENRES = ["Action", "Comedy", "Drama", "Fantasy", "Romance", "Sci-Fi", "Mystery"]
+SAISONS = ["Winter", "Spring", "Summer", "Fall"]
+
+
+def profil_aleatoire(rng):
+    return {'studio': rng.choice(STUDIOS), 'source': rng.choice(SOURCES), 'type': rng.choice(TYPES),
+            'rating': rng.choice(RATINGS), 'genre': rng.choice(GENRES), 'saison': rng.choice(SAISONS)}
+
+
+def requete(hote, chemin, donnees):
+    corps = json.dumps(donnees).encode('utf-8')
+    entete = (f"POST {chemin} HTTP/1.1\r\nHost: {hote}\r\nContent-Type: application/json\r\n"
+              f"Content-Length: {len(corps)}\r\n\r\n")
+    return entete.encode('latin-1') + corps
+
+
+async def client(hote, port, nb_requetes, taille_lot, latences, graine):
+    rng = random.Random(graine)
+    lecteur, ecrivain = await asyncio.open_connection(hote, port)
+    try:
+        for _ in range(nb_requetes):
+            if taille_lot > 1:
+                message = requete(hote, "/predire/lot", {'profils': [profil_aleatoire(rng) for _ in range(taille_lot)]})
+            else:
+                message = requete(hote, "/predire", profil_aleatoire(rng))
+            debut = time.perf_counter()
+            ecrivain.write(message)
+            await ecrivain.drain()
+            entete = await lecteur.readuntil(b"\r\n\r\n")
+            longueur = 0
+            for ligne in entete.decode('latin-1').split("\r\n"):
+                if ligne.lower().startswith("content-length:"):
+                    longueur = int(ligne.split(":", 1)[1])
+            await lecteur.readexactly(longueur)
+            latences.append(time.perf_counter() - debut)
+    finally:
+        ecrivain.close()
+
+
+async def charger(hote, port, connexions, nb_requetes, taille_lot):
+    latences = []
+    debut = time.perf_counter()
+    await asyncio.gather(*(client(hote, port, nb_requetes, taille_lot, latences, i) for i in range(connexions)))
+    duree = time.perf_counter() - debut
+
+    latences = np.array(latences) * 1000
+    total = len(latences)
+    print(f"{total} requêtes en {duree:.2f} s : {total / duree:.0f} req/s, "
+          f"{total * taille_lot / duree:.0f} profils/s")
+    print(f"Latence p50 {np.percentile(latences, 50):.2f} ms, p99 {np.percentile(latences, 99):.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Test de charge du service de prédiction")
+    parser.add_argument('--hote', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--connexions', type=int, default=32)
+    parser.add_argument('--requetes', type=int, default=200, help="Requêtes par connexion")
+    parser.add_argument('--lot', type=int, default=1, help="Profils par requête (1 = /predire)")
+    args = parser.parse_args()
+
+    asyncio.run(charger(args.hote, args.port, args.connexions, args.requetes, args.lot))
@@ -0,0 +1,179 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+# ====================================================================
+# GÉNÉRATEUR DE DONNÉES SYNTHÉTIQUES (SCHÉMAS MYANIMELIST)
+# ====================================================================
+# Produit des CSV au format de anime-dataset-2023.csv (script.py) et de
+# popular_anime.csv (mathieu.py, matheo.py, test.py), avec des cardinalités
+# proches des vraies données : ~1500 studios en loi de Zipf, 21 genres
+# combinés par ligne, et un score qui dépend réellement des catégories.
+
+GENRES = ["Action", "Adventure", "Avant Garde", "Award Winning", "Boys Love", "Comedy", "Drama",
+          "Ecchi", "Erotica", "Fantasy", "Girls Love", "Gourmet", "Hentai", "Horror", "Mystery",
+          "Romance", "Sci-Fi", "Slice of Life", "Sports", "Supernatural", "Suspense"]
+TYPES = ["TV", "Movie", "OVA", "ONA", "Special", "Music", "UNKNOWN"]
+SOURCES = ["Manga", "Original", "Light novel", "Visual novel", "Novel", "Web manga", "4-koma manga",
+           "Game", "Other", "Music", "Picture book", "Book", "Card game", "Radio", "Mixed media", "Unknown"]
+RATINGS = ["PG-13 - Teens 13 or older", "R - 17+ (violence & profanity)", "G - All Ages",
+           "PG - Children", "R+ - Mild Nudity", "Rx - Hentai", "UNKNOWN"]
+SAISONS = ["spring", "summer", "fall", "winter"]
+NB_STUDIOS = 1500
+TAILLE_BLOC = 1_000_000
+
+
+def _tirer_zipf(rng, n, nb_categories, a=1.3):
+    # Rang tiré selon une loi de Zipf tronquée : quelques studios très fréquents
+    poids = 1.0 / np.arange(1, nb_categories + 1) ** a
+    return rng.choice(nb_categories, size=n, p=poids / poids.sum())
+
+
+def _tirer_genres(rng, n):
+    """Chaînes 'Action, Comedy, ...' (1 à 4 genres), et matrice d'appartenance."""
+    nb = rng.integers(1, 5, size=n)
+    cles = rng.random((n, len(GENRES)))
+    rangs = np.argsort(cles, axis=1)
+    masques = np.zeros(n, dtype=np.int64)
+    for k in range(4):
+        actif = nb > k
+        masques[actif] |= np.int64(1) << rangs[actif, k].astype(np.int64)
+
+    # Chaque combinaison distincte n'est formatée qu'une fois
+    uniques, inverse = np.unique(masques, return_inverse=True)
+    textes = np.array([", ".join(g for i, g in enumerate(GENRES) if m >> i & 1) for m in uniques], dtype=object)
+    appartenance = (masques[:, None] >> np.arange(len(GENRES))) & 1
+    return textes[inverse], appartenance
+
+
+def _effets(rng, taille, echelle):
+    return rng.normal(0, echelle, size=taille)
+
+
+def _bloc(rng, n, effets, debut):
+    studios = _tirer_zipf(rng, n, NB_STUDIOS)
+    types = rng.choice(len(TYPES), size=n, p=[0.35, 0.15, 0.15, 0.15, 0.12, 0.05, 0.03])
+    sources = _tirer_zipf(rng, n, len(SOURCES), a=1.0)
+    ratings = rng.choice(len(RATINGS), size=n, p=[0.4, 0.2, 0.15, 0.1, 0.08, 0.04, 0.03])
+    saisons = rng.integers(0, 4, size=n)
+    annees = rng.integers(1960, 2024, size=n)
+    genres, appartenance = _tirer_genres(rng, n)
+
+    score = (6.5 + effets['studio'][studios] + effets['type'][types] + effets['source'][sources]
+             + effets['rating'][ratings] + effets['saison'][saisons]
+             + appartenance @ effets['genre'] / np.maximum(appartenance.sum(axis=1), 1)
+             + rng.normal(0, 0.7, size=n))
+    score = np.round(np.clip(score, 1.0, 10.0), 2)
+
+    return {
+        'id': np.arange(debut, debut + n),
+        'studios': np.array([f"Studio {i}" for i in range(NB_STUDIOS)], dtype=object)[studios],
+        'types': np.array(TYPES, dtype=object)[types],
+        'sources': np.array(SOURCES, dtype=object)[sources],
+        'ratings': np.array(RATINGS, dtype=object)[ratings],
+        'saisons': saisons,
+        'annees': annees,
+        'genres': genres,
+        'score': score,
+    }
+
+
+def _ecrire(chemin, n, graine, construire):
+    rng = np.random.default_rng(graine)
+    effets = {
+        'studio': _effets(rng, NB_STUDIOS, 0.5),
+        'type': _effets(rng, len(TYPES), 0.3),
+        'source': _effets(rng, len(SOURCES), 0.3),
+        'rating': _effets(rng, len(RATINGS), 0.3),
+        'saison': _effets(rng, len(SAISONS), 0.1),
+        'genre': _effets(rng, len(GENRES), 0.4),
+    }
+    for debut in range(0, n, TAILLE_BLOC):
+        taille = min(TAILLE_BLOC, n - debut)
+        df = construire(rng, _bloc(rng, taille, effets, debut), taille)
+        df.to_csv(chemin, mode='w' if debut == 0 else 'a', header=(debut == 0), index=False)
+    return chemin
+
+
+def _ligne_anime_dataset(rng, b, n):
+    premiered = np.array(SAISONS, dtype=object)[b['saisons']] + " " + b['annees'].astype(str)
+    premiered[rng.random(n) < 0.45] = "UNKNOWN"
+    score = b['score'].astype(str).astype(object)
+    score[rng.random(n) < 0.3] = "UNKNOWN"
+    return pd.DataFrame({
+        'anime_id': b['id'],
+        'Name': "Anime " + b['id'].astype(str),
+        'English name': "UNKNOWN",
+        'Other name': "UNKNOWN",
+        'Score': score,
+        'Genres': b['genres'],
+        'Synopsis': "Synopsis " + b['id'].astype(str) + " " + "lorem ipsum " * 20,
+        'Type': b['types'],
+        'Episodes': rng.integers(1, 60, size=n),
+        'Aired': "UNKNOWN",
+        'Premiered': premiered,
+        'Status': "Finished Airing",
+        'Producers': "UNKNOWN",
+        'Licensors': "UNKNOWN",
+        'Studios': b['studios'],
+        'Source': b['sources'],
+        'Duration': "24 min per ep",
+        'Rating': b['ratings'],
+        'Rank': rng.integers(1, 25000, size=n),
+        'Popularity': rng.integers(1, 25000, size=n),
+        'Favorites': rng.integers(0, 10000, size=n),
+        'Scored By': rng.integers(0, 1_000_000, size=n),
+        'Members': rng.integers(0, 1_000_000, size=n),
+        'Image URL': "https://cdn.myanimelist.net/images/anime/0.jpg",
+    })
+
+
+def _ligne_popular_anime(rng, b, n):
+    mois = b['saisons'] * 3 + rng.integers(1, 4, size=n)
+    aired_from = pd.to_datetime({'year': b['annees'], 'month': mois, 'day': rng.integers(1, 29, size=n)})
+    aired_from = aired_from.dt.strftime("%Y-%m-%dT00:00:00+00:00").to_numpy(dtype=object)
+    aired_from[rng.random(n) < 0.02] = np.nan
+    genres = b['genres'].copy()
+    genres[rng.random(n) < 0.02] = np.nan
+    return pd.DataFrame({
+        'name': "Anime " + b['id'].astype(str),
+        'genres': genres,
+        'type': np.where(b['types'] == "UNKNOWN", "TV", b['types']),
+        'episodes': np.where(rng.random(n) < 0.02, np.nan, rng.integers(1, 60, size=n)),
+        'status': "Finished Airing",
+        'aired_from': aired_from,
+        'aired_to': aired_from,
+        'duration_per_ep': "24 min",
+        'score': np.where(rng.random(n) < 0.05, np.nan, b['score']),
+        'scored_by': rng.integers(100, 1_000_000, size=n),
+        'rank': np.arange(1, n + 1),
+        'rating': b['ratings'],
+        'studios': b['studios'],
+        'producers': "Aniplex",
+        'image': "https://cdn.myanimelist.net/images/anime/0.jpg",
+        'trailer': np.nan,
+        'synopsis': "Synopsis " + b['id'].astype(str) + " " + "lorem ipsum " * 20,
+    })
+
+
+def generer_anime_dataset(chemin, n, graine=0):
+    """CSV au schéma de anime-dataset-2023.csv."""
+    return _ecrire(chemin, n, graine, _ligne_anime_dataset)
+
+
+def generer_popular_anime(chemin, n, graine=0):
+    """CSV au schéma de popular_anime.csv."""
+    return _ecrire(chemin, n, graine, _ligne_popular_anime)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Génère des CSV synthétiques aux schémas MyAnimeList")
+    parser.add_argument('lignes', type=int)
+    parser.add_argument('--anime-dataset', default='anime-dataset-2023.csv')
+    parser.add_argument('--popular-anime', default='popular_anime.csv')
+    parser.add_argument('--graine', type=int, default=0)
+    args = parser.parse_args()
+
+    generer_anime_dataset(args.anime_dataset, args.lignes, args.graine)
+    generer_popular_anime(args.popular_anime, args.lignes, args.graine)
@@ -0,0 +1,103 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# ==========================================
+# INGESTION INCRÉMENTALE D'UN INSTANTANÉ CSV
+# ==========================================
+# Chaque ligne reçoit une clé (colonne d'identifiant + numéro d'occurrence, pour
+# rester unique malgré les doublons) et un hash de son contenu. Le nouvel
+# instantané est lu par morceaux et comparé à l'état précédent : seules les
+# lignes ajoutées ou modifiées sont conservées en mémoire, les clés disparues
+# sont signalées comme supprimées. Lecture et hachage restent proportionnels à
+# la taille du fichier, mais nettoyage et entraînement ne portent plus que sur
+# les différences.
+
+
+def _hash(valeurs):
+    return pd.util.hash_pandas_object(valeurs, index=False).to_numpy()
+
+
+def empreintes_morceau(chunk, colonne_cle, occurrences):
+    """Clés (uint64, uniques), hash de contenu de chaque ligne d'un morceau et compteur mis à jour.
+
+    occurrences : Series {hash de l'identifiant: nombre déjà vu dans les morceaux précédents}.
+    """
+    identifiants = pd.Series(_hash(chunk[colonne_cle].astype(str)))
+    rang = identifiants.groupby(identifiants.to_numpy()).cumcount().to_numpy()
+    if len(occurrences):
+        rang = rang + identifiants.map(occurrences).fillna(0).to_numpy(dtype=np.int64)
+    occurrences = occurrences.add(identifiants.value_counts(), fill_value=0)
+
+    cles = _hash(pd.DataFrame({'id': identifiants.to_numpy(), 'occurrence': rang}))
+    return cles, _hash(chunk), occurrences
+
+
+def rechercher_cles(anciennes_cles, cles):
+    """Position de chaque clé dans les anciennes clés triées et masque des clés trouvées."""
+    if not len(anciennes_cles):
+        return np.zeros(len(cles), dtype=np.int64), np.zeros(len(cles), dtype=bool)
+    position = np.minimum(np.searchsorted(anciennes_cles, cles), len(anciennes_cles) - 1)
+    return position, anciennes_cles[position] == cles
+
+
+class Differences:
+    def __init__(self, cles, hashes, lignes, inserees, modifiees, supprimees):
+        self.cles = cles              # clés du nouvel instantané, triées
+        self.hashes = hashes          # hash de contenu alignés sur cles
+        self.lignes = lignes          # lignes ajoutées ou modifiées (colonne _cle)
+        self.inserees = inserees
+        self.modifiees = modifiees
+        self.supprimees = supprimees
+
+    def a_retirer(self):
+        """Clés dont l'ancienne version doit être retirée (modifiées ou supprimées)."""
+        return np.concatenate([self.modifiees, self.supprimees])
+
+    def stats(self):
+        return {'lignes': len(self.cles), 'inserees': len(self.inserees),
+                'modifiees': len(self.modifiees), 'supprimees': len(self.supprimees)}
+
+
+def comparer_instantane(lecteur, colonne_cle, anciennes_cles, anciens_hashes):
+    """Compare un instantané (itérable de morceaux) à l'état (clés triées, hashes alignés)."""
+    anciennes_cles = np.asarray(anciennes_cles, dtype=np.uint64)
+    anciens_hashes = np.asarray(anciens_hashes, dtype=np.uint64)
+    occurrences = pd.Series(dtype=np.int64)
+    cles, hashes, lignes, connues = [], [], [], []
+
+    for chunk in lecteur:
+        cles_chunk, hashes_chunk, occurrences = empreintes_morceau(chunk, colonne_cle, occurrences)
+        position, trouvee = rechercher_cles(anciennes_cles, cles_chunk)
+        inchangee = trouvee & (anciens_hashes[position] == hashes_chunk) if len(anciennes_cles) else trouvee
+
+        cles.append(cles_chunk)
+        hashes.append(hashes_chunk)
+        if (~inchangee).any():
+            lignes.append(chunk[~inchangee].assign(_cle=cles_chunk[~inchangee]))
+            connues.append(trouvee[~inchangee])
+
+    cles = np.concatenate(cles) if cles else np.empty(0, dtype=np.uint64)
+    hashes = np.concatenate(hashes) if hashes else np.empty(0, dtype=np.uint64)
+    ordre = np.argsort(cles)
+    lignes = pd.concat(lignes, ignore_index=True) if lignes else pd.DataFrame({'_cle': np.empty(0, np.uint64)})
+    connues = np.concatenate(connues) if connues else np.zeros(0, dtype=bool)
+
+    cles_delta = lignes['_cle'].to_numpy(dtype=np.uint64)
+    return Differences(cles[ordre], hashes[ordre], lignes,
+                       inserees=cles_delta[~connues], modifiees=cles_delta[connues],
+                       supprimees=anciennes_cles[~np.isin(anciennes_cles, cles)])
+
+
+def charger_etat(chemin):
+    """État enregistré (dictionnaire) ou None au premier passage."""
+    if not os.path.exists(chemin):
+        return None
+    return pd.read_pickle(chemin)
+
+
+def sauvegarder_etat(etat, chemin):
+    temporaire = chemin + ".tmp"
+    pd.to_pickle(etat, temporaire)
+    os.replace(temporaire, chemin)
@@ -0,0 +1,181 @@
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+# ==========================================
+# INSTRUMENTATION DES ÉTAPES (TEMPS ET MÉMOIRE)
+# ==========================================
+# Les grandes étapes (chargement, nettoyage, saisons, entraînement, prédiction,
+# dashboard) sont décorées par @instrumente("nom"). Désactivée, l'instrumentation
+# se réduit à un test de booléen par appel d'étape ; activée, chaque étape
+# produit un enregistrement JSON (une ligne par étape dans le journal) avec sa
+# durée et, sur demande, le pic mémoire mesuré par tracemalloc (pic du
+# processus entier : des étapes simultanées dans plusieurs threads se cumulent).
+#
+# Activation : activer(...) dans le code, --profil dans script.py, ou les
+# variables d'environnement ANIME_PROFIL=journal.jsonl (ANIME_PROFIL_MEMOIRE=1).
+
+# Enregistrements gardés en mémoire pour resume() : les plus anciens sont oubliés
+# au-delà (predire_note produit une étape par appel) ; le journal garde tout
+MAX_ENREGISTREMENTS = 100_000
+
+_etat = {'actif': False, 'memoire': False, 'journal': None, 'execution': None}
+_enregistrements = deque(maxlen=MAX_ENREGISTREMENTS)
+_verrou = threading.Lock()
+_pile = threading.local()
+
+
+def activer(journal=None, memoire=False):
+    """Active l'instrumentation ; journal : fichier JSON lines complété à chaque étape."""
+    if memoire and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    with _verrou:
+        _fermer_journal()
+        # Un seul descripteur pour tout le journal, vidé à chaque ligne
+        fichier = open(journal, 'a', encoding='utf-8', buffering=1) if journal else None
+        _etat.update(actif=True, memoire=memoire, journal=fichier, execution=uuid.uuid4().hex[:12])
+
+
+def _fermer_journal():
+    if _etat['journal'] is not None:
+        _etat['journal'].close()
+        _etat['journal'] = None
+
+
+def desactiver():
+    if _etat['memoire'] and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    with _verrou:
+        _fermer_journal()
+        _etat.update(actif=False, memoire=False)
+
+
+def est_actif():
+    return _etat['actif']
+
+
+def enregistrements():
+    with _verrou:
+        return list(_enregistrements)
+
+
+def _empiler(nom):
+    pile = getattr(_pile, 'etapes', None)
+    if pile is None:
+        pile = _pile.etapes = []
+    cadre = {'etape': nom, 'debut': time.perf_counter(), 'infos': {}, 'pic_enfants': 0}
+    if _etat['memoire']:
+        actuelle, pic = tracemalloc.get_traced_memory()
+        if pile:
+            # reset_peak efface aussi le pic du parent atteint avant cette sous-étape : on le lui reporte
+            pile[-1]['pic_enfants'] = max(pile[-1]['pic_enfants'], pic)
+        cadre['memoire_debut'] = actuelle
+        tracemalloc.reset_peak()
+    pile.append(cadre)
+    return pile, cadre
+
+
+def _depiler(pile, cadre, erreur):
+    secondes = time.perf_counter() - cadre['debut']
+    pile.pop()
+    enregistrement = {
+        'execution': _etat['execution'],
+        'date': datetime.now().isoformat(timespec='milliseconds'),
+        'etape': cadre['etape'],
+        'parent': pile[-1]['etape'] if pile else None,
+        'secondes': round(secondes, 6),
+        'thread': threading.current_thread().name,
+    }
+    if _etat['memoire'] and 'memoire_debut' in cadre:
+        # Le pic d'une étape englobe ceux de ses sous-étapes et celui atteint avant chacune d'elles
+        pic = max(tracemalloc.get_traced_memory()[1], cadre['pic_enfants'])
+        if pile:
+            pile[-1]['pic_enfants'] = max(pile[-1]['pic_enfants'], pic)
+        enregistrement['pic_memoire_mo'] = round((pic - cadre['memoire_debut']) / 1e6, 3)
+    if erreur is not None:
+        enregistrement['erreur'] = type(erreur).__name__
+    enregistrement.update(cadre['infos'])
+
+    with _verrou:
+        _enregistrements.append(enregistrement)
+        if _etat['journal'] is not None:
+            _etat['journal'].write(json.dumps(enregistrement, default=str) + "\n")
+
+
+@contextmanager
+def etape(nom):
+    """Bloc instrumenté : with etape("chargement"): ..."""
+    if not _etat['actif']:
+        yield
+        return
+    pile, cadre = _empiler(nom)
+    erreur = None
+    try:
+        yield
+    except BaseException as e:
+        erreur = e
+        raise
+    finally:
+        _depiler(pile, cadre, erreur)
+
+
+def instrumente(nom):
+    """Décorateur : chaque appel de la fonction devient une étape nommée."""
+    def decorateur(fonction):
+        @functools.wraps(fonction)
+        def enveloppe(*args, **kwargs):
+            if not _etat['actif']:
+                return fonction(*args, **kwargs)
+            with etape(nom):
+                return fonction(*args, **kwargs)
+        return enveloppe
+    return decorateur
+
+
+def annoter(**infos):
+    """Ajoute des informations (nombre de lignes...) à l'étape en cours."""
+    if not _etat['actif']:
+        return
+    pile = getattr(_pile, 'etapes', None)
+    if pile:
+        pile[-1]['infos'].update(infos)
+
+
+def resume():
+    """Agrégats par étape : appels, temps total / moyen / max, pic mémoire max."""
+    lignes = {}
+    for e in enregistrements():
+        ligne = lignes.setdefault(e['etape'], {'etape': e['etape'], 'appels': 0, 'total_s': 0.0,
+                                               'max_s': 0.0, 'pic_memoire_mo': None})
+        ligne['appels'] += 1
+        ligne['total_s'] += e['secondes']
+        ligne['max_s'] = max(ligne['max_s'], e['secondes'])
+        if e.get('pic_memoire_mo') is not None:
+            ligne['pic_memoire_mo'] = max(ligne['pic_memoire_mo'] or 0.0, e['pic_memoire_mo'])
+    for ligne in lignes.values():
+        ligne['moyenne_s'] = ligne['total_s'] / ligne['appels']
+    return sorted(lignes.values(), key=lambda l: l['total_s'], reverse=True)
+
+
+def resume_texte():
+    """Tableau texte du résumé, pour la console ou l'interface."""
+    lignes = resume()
+    if not lignes:
+        return "Aucune étape mesurée."
+    texte = [f"{'Étape':<22}{'Appels':>7}{'Total (s)':>11}{'Moy. (s)':>10}{'Max (s)':>10}{'Pic (Mo)':>10}"]
+    for l in lignes:
+        pic = "" if l['pic_memoire_mo'] is None else f"{l['pic_memoire_mo']:.1f}"
+        texte.append(f"{l['etape']:<22}{l['appels']:>7}{l['total_s']:>11.3f}{l['moyenne_s']:>10.4f}"
+                     f"{l['max_s']:>10.3f}{pic:>10}")
+    return "\n".join(texte)
+
+
+if os.environ.get('ANIME_PROFIL'):
+    activer(os.environ['ANIME_PROFIL'], memoire=os.environ.get('ANIME_PROFIL_MEMOIRE') == '1')
@@ -0,0 +1,95 @@
+import heapq
+
+import numpy as np
+
+from modele_compile import NOMS_DIMENSIONS
+
+# ==========================================
+# RECHERCHE DES K MEILLEURS (OU PIRES) PROFILS
+# ==========================================
+# La note est base + somme d'un ajustement par dimension, bornée à [1, 10].
+# Le bornage est monotone : les K meilleures sommes donnent les K meilleures
+# notes. Chaque dimension est triée une fois, puis les K meilleures sommes
+# sont extraites avec un tas sur les vecteurs d'indices (chaque extraction
+# pousse au plus un voisin par dimension), sans parcourir le produit cartésien.
+#
+# Fonctionne avec tout ModeleCompile : modèle additif de script.py ou
+# coefficients OLS convertis par modele_ols.modele_additif_depuis_ols.
+
+VALEURS_IGNOREES = {"Unknown", "UNKNOWN", "nan"}
+
+
+def _en_ensemble(valeurs):
+    if valeurs is None:
+        return None
+    if isinstance(valeurs, str):
+        return {valeurs}
+    return set(valeurs)
+
+
+def options_dimension(modele, dim, autorisees=None, exclues=None):
+    """Valeurs admissibles d'une dimension et leurs ajustements.
+
+    autorisees fixe la dimension (une valeur ou une liste) ; une valeur fixée
+    inconnue du modèle reste admise avec un ajustement nul, comme dans
+    predire_note. Une dimension sans aucune catégorie (la source pour l'OLS)
+    donne une seule option vide et neutre.
+    """
+    autorisees, exclues = _en_ensemble(autorisees), _en_ensemble(exclues) or set()
+    codes = modele.codes_categories[dim]
+    if autorisees is None:
+        if not modele.categories[dim]:
+            return [""], np.zeros(1)
+        valeurs = [v for v in modele.categories[dim] if v not in VALEURS_IGNOREES]
+    else:
+        valeurs = sorted(autorisees)
+    valeurs = [v for v in valeurs if v not in exclues]
+    ajustements = modele.ajustements[dim][[codes.get(v, modele.code_inconnu(dim)) for v in valeurs]]
+    return valeurs, np.asarray(ajustements, dtype=np.float64)
+
+
+def meilleurs_profils(modele, k=10, contraintes=None, exclusions=None, pires=False):
+    """K profils de note maximale (ou minimale avec pires=True).
+
+    contraintes : {dim: valeur ou liste de valeurs autorisées}
+    exclusions  : {dim: valeur ou liste de valeurs interdites}
+    Renvoie une liste de {'score', 'profil': {dim: valeur}, 'contributions': {dim: ajustement}},
+    de la meilleure à la moins bonne (ou de la pire à la moins mauvaise).
+    """
+    contraintes, exclusions = contraintes or {}, exclusions or {}
+    signe = -1.0 if pires else 1.0
+
+    valeurs, ajustements = [], []
+    for dim in NOMS_DIMENSIONS:
+        vals, adj = options_dimension(modele, dim, contraintes.get(dim), exclusions.get(dim))
+        if not vals:
+            return []
+        # Tri stable : à ajustement égal, l'ordre alphabétique des catégories est conservé
+        ordre = np.argsort(-signe * adj, kind='stable')
+        valeurs.append([vals[i] for i in ordre])
+        ajustements.append(adj[ordre])
+
+    # Le tas contient (-signe * somme, indices) : on extrait la somme la plus favorable
+    def somme(indices):
+        return sum(float(a[i]) for a, i in zip(ajustements, indices))
+
+    depart = (0,) * len(ajustements)
+    tas = [(-signe * somme(depart), depart)]
+    vus = {depart}
+    resultats = []
+    while tas and len(resultats) < k:
+        cle, indices = heapq.heappop(tas)
+        total = -signe * cle
+        resultats.append({
+            'score': float(np.clip(modele.base_score + total, 1.0, 10.0)),
+            'profil': {dim: valeurs[d][i] for d, (dim, i) in enumerate(zip(NOMS_DIMENSIONS, indices))},
+            'contributions': {dim: float(ajustements[d][i])
+                              for d, (dim, i) in enumerate(zip(NOMS_DIMENSIONS, indices))},
+        })
+        for d in range(len(indices)):
+            if indices[d] + 1 < len(ajustements[d]):
+                voisin = indices[:d] + (indices[d] + 1,) + indices[d + 1:]
+                if voisin not in vus:
+                    vus.add(voisin)
+                    heapq.heappush(tas, (-signe * somme(voisin), voisin))
+    return resultats
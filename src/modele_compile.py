@@ -0,0 +1,65 @@
+import numpy as np
+
+# ==========================================
+# MODÈLE ADDITIF COMPILÉ (NUMPY SEUL)
+# ==========================================
+# Les dictionnaires adj_* sont transformés une fois pour toutes en
+# (catégorie -> code) + tableau d'ajustements. Noter un lot de profils revient
+# alors à des recherches de codes et des additions de tableaux, sans pandas.
+
+# Ordre d'addition identique à predire_note
+DIMENSIONS = [
+    ('studio', 'adj_studio', "Studio"),
+    ('source', 'adj_source', "Source"),
+    ('type', 'adj_type', "Format"),
+    ('rating', 'adj_rating', "Rating"),
+    ('saison', 'adj_season', "Saison"),
+    ('genre', 'adj_genre', "Genre"),
+]
+NOMS_DIMENSIONS = [dim for dim, _, _ in DIMENSIONS]
+
+
+class ModeleCompile:
+    def __init__(self, model):
+        self.base_score = float(model['base_score'])
+        self.categories = {}
+        self.codes_categories = {}
+        self.ajustements = {}
+        for dim, cle, _ in DIMENSIONS:
+            categories = list(model[cle].keys())
+            self.categories[dim] = categories
+            self.codes_categories[dim] = {cat: i for i, cat in enumerate(categories)}
+            # Dernière case : catégorie inconnue (ajustement nul, comme .get(x, 0))
+            self.ajustements[dim] = np.append(np.array(list(model[cle].values()), dtype=np.float64), 0.0)
+
+    def code_inconnu(self, dim):
+        return len(self.categories[dim])
+
+    def codes(self, dim, valeurs):
+        """Codes des valeurs d'une dimension (code_inconnu pour une catégorie absente du modèle)."""
+        index = self.codes_categories[dim]
+        inconnu = self.code_inconnu(dim)
+        return np.fromiter((index.get(v, inconnu) for v in valeurs), dtype=np.int64, count=len(valeurs))
+
+    def contributions(self, profils):
+        """Ajustement de chaque dimension pour chaque profil ({dim: liste de valeurs})."""
+        return {dim: self.ajustements[dim][self.codes(dim, profils[dim])] for dim in NOMS_DIMENSIONS}
+
+    def predire_codes(self, codes):
+        """Notes bornées à [1, 10] à partir de codes déjà calculés ({dim: tableau})."""
+        scores = None
+        for dim in NOMS_DIMENSIONS:
+            adj = self.ajustements[dim][codes[dim]]
+            scores = self.base_score + adj if scores is None else scores + adj
+        return np.clip(scores, 1.0, 10.0)
+
+    def predire(self, profils, avec_contributions=False):
+        """Note un lot de profils ; renvoie les notes et, sur demande, les contributions."""
+        contributions = self.contributions(profils)
+        scores = np.full(len(profils[NOMS_DIMENSIONS[0]]), self.base_score)
+        for dim in NOMS_DIMENSIONS:
+            scores = scores + contributions[dim]
+        scores = np.clip(scores, 1.0, 10.0)
+        if avec_contributions:
+            return scores, contributions
+        return scores
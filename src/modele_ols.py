@@ -0,0 +1,288 @@
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from instrumentation import instrumente
+from nettoyage import charger_donnees_propres
+
+# ====================================================================
+# MODÈLE OLS (popular_anime.csv) : ENCODAGE CREUX ET AJUSTEMENT
+# ====================================================================
+# Chaque profil n'active qu'une poignée d'indicatrices (quelques genres, un
+# type, une classification, une saison, un studio) : la matrice de design est
+# donc stockée en CSR et l'ajustement passe par les équations normales
+# accumulées bloc par bloc, sans jamais matérialiser la matrice dense.
+
+COLONNES_A_ENCODER = ['type', 'rating', 'season_aired', 'first_studio']
+COLONNES_A_EXCLURE = ['score', 'scored_by', 'rank', 'episodes']
+PREFIXE_GENRE = 'Genre_'
+
+
+def charger_donnees_ols(chemin_brut):
+    """Données du modèle OLS, nettoyées et préparées comme dans test.py."""
+    df = charger_donnees_propres(chemin_brut)
+    df = df[df['score'] <= 10.0].dropna(subset=['season_aired'])
+    return preparer_donnees_ols(df)
+
+
+def preparer_donnees_ols(df):
+    """Ajoute genres_list et first_studio, puis retire les lignes sans studio ni saison."""
+    df = df.copy()
+    df['genres_list'] = df['genres'].apply(lambda x: [g.strip() for g in x.split(',')] if isinstance(x, str) else [])
+    df['first_studio'] = df['studios'].apply(lambda x: x.split(',')[0].strip() if isinstance(x, str) else np.nan)
+    df = df.dropna(subset=['first_studio', 'season_aired'])
+    return df.reset_index(drop=True)
+
+
+def _colonnes_numeriques(df):
+    # Colonnes numériques conservées telles quelles (hors cible et identifiants)
+    numeriques = df.select_dtypes(include=[np.number]).columns
+    return [c for c in numeriques if c not in COLONNES_A_EXCLURE]
+
+
+def _categories(df, col):
+    # Catégories triées d'une colonne encodée : la première est la référence (drop_first)
+    return sorted(df[col].dropna().unique())
+
+
+def categories_reference(df):
+    """Catégorie de référence de chaque colonne encodée ({colonne: catégorie}), sans indicatrice."""
+    references = {}
+    for col in COLONNES_A_ENCODER:
+        categories = _categories(df, col)
+        if categories:
+            references[col] = categories[0]
+    return references
+
+
+def construire_features(df):
+    """Noms des colonnes du modèle, dans l'ordre du pipeline dense (get_dummies, drop_first)."""
+    features = _colonnes_numeriques(df)
+    genres = sorted({g for liste in df['genres_list'] for g in liste})
+    features += [PREFIXE_GENRE + g for g in genres]
+    for col in COLONNES_A_ENCODER:
+        features += [f"{col}_{cat}" for cat in _categories(df, col)[1:]]
+    return features
+
+
+def encoder_creux(df, features):
+    """Matrice CSR (lignes x features) ; les valeurs absentes de features sont ignorées.
+
+    features doit contenir 'const' si l'on veut la colonne de constante.
+    """
+    index = {nom: i for i, nom in enumerate(features)}
+    n = len(df)
+    lignes, colonnes, valeurs = [], [], []
+
+    def ajouter_indicatrices(noms, positions_lignes):
+        cols = pd.Series(noms, dtype=object).map(index).to_numpy(dtype=float)
+        connues = ~np.isnan(cols)
+        lignes.append(np.asarray(positions_lignes)[connues])
+        colonnes.append(cols[connues].astype(np.int64))
+        valeurs.append(np.ones(connues.sum()))
+
+    # Genres (multi-étiquettes) : un même genre n'est compté qu'une fois par ligne
+    genres = df['genres_list'].reset_index(drop=True).explode().dropna()
+    genres = genres.reset_index().drop_duplicates()
+    ajouter_indicatrices(PREFIXE_GENRE + genres['genres_list'].astype(str), genres['index'])
+
+    for col in COLONNES_A_ENCODER:
+        presentes = df[col].notna().to_numpy()
+        noms = col + "_" + df[col].astype(str).to_numpy()[presentes]
+        ajouter_indicatrices(noms, np.arange(n)[presentes])
+
+    for col in _colonnes_numeriques(df):
+        if col in index:
+            lignes.append(np.arange(n))
+            colonnes.append(np.full(n, index[col]))
+            valeurs.append(df[col].to_numpy(dtype=float))
+
+    if 'const' in index:
+        lignes.append(np.arange(n))
+        colonnes.append(np.full(n, index['const']))
+        valeurs.append(np.ones(n))
+
+    return sp.csr_matrix((np.concatenate(valeurs), (np.concatenate(lignes), np.concatenate(colonnes))),
+                         shape=(n, len(features)))
+
+
+@instrumente("encodage_ols")
+def matrices_ols(df):
+    """Construit (X creux, Y, features) comme le pipeline dense de test.py.
+
+    Les lignes incomplètes et les colonnes constantes sont retirées, la
+    constante est ajoutée en dernière position.
+    """
+    features = construire_features(df)
+    X = encoder_creux(df, features)
+    Y = df['score'].to_numpy(dtype=float)
+
+    # Lignes avec une valeur manquante (score ou colonne numérique)
+    completes = ~np.isnan(Y)
+    numeriques = _colonnes_numeriques(df)
+    if numeriques:
+        completes &= df[numeriques].notna().all(axis=1).to_numpy()
+    X, Y = X[completes], Y[completes]
+
+    # Colonnes constantes (équivalent de X.nunique() > 1) : une colonne vide est
+    # constante, une colonne pleine l'est si toutes ses valeurs sont égales
+    X = X.tocsc()
+    X.eliminate_zeros()
+    nnz = np.diff(X.indptr)
+    variables = nnz > 0
+    for j in np.flatnonzero(nnz == X.shape[0]):
+        colonne = X.data[X.indptr[j]:X.indptr[j + 1]]
+        variables[j] = colonne.min() != colonne.max()
+    features = [f for f, garder in zip(features, variables) if garder] + ['const']
+    X = sp.hstack([X[:, np.flatnonzero(variables)], np.ones((X.shape[0], 1))], format='csr')
+    return X, Y, features
+
+
+class ResultatOLS:
+    """Sous-ensemble de l'interface des résultats statsmodels utilisé par le projet."""
+
+    def __init__(self, params, rsquared, nobs):
+        self.params = params
+        self.rsquared = rsquared
+        self.nobs = nobs
+
+
+@instrumente("entrainement_ols")
+def ajuster_ols_creux(X, Y, features, taille_bloc=100_000):
+    """Moindres carrés sur matrice creuse par équations normales accumulées par blocs.
+
+    La pseudo-inverse de X'X donne la même solution (de norme minimale) que
+    la pseudo-inverse de X utilisée par statsmodels.
+    """
+    p = X.shape[1]
+    XtX = np.zeros((p, p))
+    XtY = np.zeros(p)
+    for debut in range(0, X.shape[0], taille_bloc):
+        bloc = X[debut:debut + taille_bloc]
+        XtX += (bloc.T @ bloc).toarray()
+        XtY += bloc.T @ Y[debut:debut + taille_bloc]
+
+    params = np.linalg.pinv(XtX, hermitian=True) @ XtY
+
+    residus = Y - X @ params
+    ssr = float(residus @ residus)
+    centres = Y - Y.mean()
+    rsquared = 1.0 - ssr / float(centres @ centres)
+    return ResultatOLS(pd.Series(params, index=features), rsquared, X.shape[0])
+
+
+def ajuster_ols_dense(df):
+    """Chemin dense de référence (get_dummies + statsmodels), pour comparaison."""
+    import statsmodels.api as sm
+    from sklearn.preprocessing import MultiLabelBinarizer
+
+    mlb = MultiLabelBinarizer()
+    genre_dummies = pd.DataFrame(mlb.fit_transform(df['genres_list']),
+                                 columns=[PREFIXE_GENRE + genre for genre in mlb.classes_],
+                                 index=df.index)
+    df_encoded = pd.concat([df, genre_dummies], axis=1)
+    df_encoded = pd.get_dummies(df_encoded, columns=COLONNES_A_ENCODER, prefix=COLONNES_A_ENCODER,
+                                drop_first=True, dtype=int)
+
+    Y = df_encoded['score']
+    X = df_encoded.select_dtypes(include=[np.number])
+    X = X.drop(columns=COLONNES_A_EXCLURE, errors='ignore')
+    data_final = pd.concat([X, Y], axis=1).dropna()
+    X = data_final.drop(columns=['score'], errors='ignore')
+    Y = data_final['score']
+    X = X.loc[:, X.nunique() > 1]
+    X = sm.add_constant(X, prepend=False)
+    return sm.OLS(Y, X).fit()
+
+
+# Préfixe des indicatrices de chaque dimension d'un profil
+PREFIXES_PROFIL = {
+    'adj_studio': 'first_studio_',
+    'adj_type': 'type_',
+    'adj_rating': 'rating_',
+    'adj_season': 'season_aired_',
+    'adj_genre': PREFIXE_GENRE,
+}
+
+
+def modele_additif_depuis_ols(params, references):
+    """Coefficients OLS mis au format du modèle additif de script.py.
+
+    Un profil (un studio, un type, une classification, une saison, un genre)
+    active au plus une indicatrice par dimension : sa note est donc la
+    constante plus un coefficient par dimension. La source n'existe pas dans
+    popular_anime.csv et reste sans effet. Les catégories de référence
+    (drop_first, voir categories_reference) n'ont pas d'indicatrice : elles
+    sont ajoutées avec un coefficient nul.
+    """
+    model = {'base_score': float(params['const']), 'adj_source': {}}
+    for cle, prefixe in PREFIXES_PROFIL.items():
+        model[cle] = {nom[len(prefixe):]: float(valeur) for nom, valeur in params.items()
+                      if nom.startswith(prefixe)}
+        reference = references.get(prefixe[:-1])
+        if reference is not None:
+            model[cle] = {reference: 0.0, **model[cle]}
+    return model
+
+
+# ====================================================================
+# PRÉDICTION PAR LOTS AVEC LES COEFFICIENTS OLS
+# ====================================================================
+# Un profil est une liste de noms de features ('Genre_Mystery', 'type_Movie'...).
+# Les noms sont convertis en positions de coefficients par un dictionnaire
+# compilé une fois ; un lot de profils devient une matrice creuse indicatrice
+# (profils x features) et ses notes un seul produit creux x coefficients. Les
+# contributions ne sont lues que sur les features actives de chaque profil.
+
+LIBELLE_CONSTANTE = 'Base Score (Intercept)'
+
+
+class ModeleOLSCompile:
+    def __init__(self, params):
+        self.features = list(params.index)
+        self.coefficients = params.to_numpy(dtype=np.float64)
+        self.positions = {nom: i for i, nom in enumerate(self.features)}
+        self.position_constante = self.positions.get('const')
+
+    def encoder(self, profils):
+        """Matrice CSR (profils x features) et, pour chaque profil, ses features inconnues du modèle."""
+        tailles = [len(profil) for profil in profils]
+        noms = np.array([nom for profil in profils for nom in profil], dtype=object)
+        colonnes = pd.Series(noms, dtype=object).map(self.positions).to_numpy(dtype=float)
+        lignes = np.repeat(np.arange(len(profils)), tailles)
+        connues = ~np.isnan(colonnes)
+
+        lignes_actives, colonnes_actives = lignes[connues], colonnes[connues].astype(np.int64)
+        if self.position_constante is not None:
+            lignes_actives = np.concatenate([lignes_actives, np.arange(len(profils))])
+            colonnes_actives = np.concatenate([colonnes_actives, np.full(len(profils), self.position_constante)])
+        X = sp.csr_matrix((np.ones(len(lignes_actives)), (lignes_actives, colonnes_actives)),
+                          shape=(len(profils), len(self.features)))
+        # Une feature répétée dans un profil ne compte qu'une fois (X = 1)
+        X.data[:] = 1.0
+
+        inconnues = [[] for _ in profils]
+        for i, nom in zip(lignes[~connues], noms[~connues]):
+            inconnues[i].append(nom)
+        return X, inconnues
+
+    def contributions(self, X, inconnues):
+        """Contributions de chaque profil, features actives seulement (coefficient x 1)."""
+        resultats = []
+        for i in range(X.shape[0]):
+            colonnes = X.indices[X.indptr[i]:X.indptr[i + 1]]
+            contributions = {self.features[j]: float(self.coefficients[j])
+                             for j in colonnes if j != self.position_constante}
+            contributions.update({f"Avertissement: {nom}": 0 for nom in inconnues[i]})
+            if self.position_constante is not None:
+                contributions[LIBELLE_CONSTANTE] = float(self.coefficients[self.position_constante])
+            resultats.append(contributions)
+        return resultats
+
+    def predire(self, profils, avec_contributions=False):
+        """Note un lot de profils (bornée à [1, 10]) ; renvoie aussi les contributions sur demande."""
+        X, inconnues = self.encoder(profils)
+        scores = np.clip(X @ self.coefficients, 1.0, 10.0)
+        if avec_contributions:
+            return scores, self.contributions(X, inconnues)
+        return scores
@@ -0,0 +1,402 @@
+import contextlib
+import csv
+import mmap
+import os
+
+import numpy as np
+import pandas as pd
+
+from ingestion import charger_etat, empreintes_morceau, rechercher_cles, sauvegarder_etat
+from instrumentation import annoter, instrumente
+from quantiles import SketchKLL
+
+# ==========================================
+# SAISONS DE DIFFUSION
+# ==========================================
+
+SAISONS = ["Winter", "Spring", "Summer", "Fall"]
+
+
+@instrumente("saisons")
+def saison_depuis_date(dates):
+    """Saison de chaque date de la colonne aired_from (NaN si absente ou invalide).
+
+    Le mois des dates ISO est lu dans leur préfixe AAAA-MM, donc dans leur
+    propre fuseau, sans conversion ; les autres formats sont analysés par
+    to_datetime une fois par valeur distincte. Le mois est ensuite ramené à un
+    indice de saison par arithmétique sur tableau.
+    """
+    if not isinstance(dates, pd.Series):
+        dates = pd.Series(dates)
+    textes = dates.astype('string')
+    mois = pd.to_numeric(textes.str.extract(r'^\s*\d{4}-(\d{2})', expand=False), errors='coerce')
+
+    autres = textes.notna() & mois.isna()
+    if autres.any():
+        uniques = pd.Series(textes[autres].unique())
+        mois_uniques = uniques.map(lambda valeur: pd.to_datetime(valeur, errors='coerce').month)
+        mois[autres] = textes[autres].map(dict(zip(uniques, mois_uniques)))
+    mois = mois.where(mois.between(1, 12))
+
+    # (mois - 1) // 3 donne 0..3 ; les dates manquantes prennent l'indice 4 (NaN)
+    index_saison = ((mois - 1) // 3).fillna(len(SAISONS)).to_numpy(dtype=np.int64)
+    table = np.array(SAISONS + [np.nan], dtype=object)
+    return pd.Series(table[index_saison], index=dates.index)
+
+
+@instrumente("saisons")
+def saison_depuis_premiered(premiered):
+    """Saison de la colonne Premiered ('spring 1998' -> 'Spring', sinon 'Unknown').
+
+    Le texte n'est découpé qu'une fois par valeur distincte, puis réindexé par code.
+    """
+    codes, uniques = pd.factorize(premiered)
+    valeurs = pd.Series(np.asarray(uniques, dtype=object), dtype=object)
+    valide = valeurs.map(type).eq(str) & valeurs.ne('UNKNOWN')
+
+    saisons = pd.Series('Unknown', index=valeurs.index, dtype=object)
+    if valide.any():
+        saisons[valide] = valeurs[valide].str.split(' ', n=1).str[0].str.capitalize()
+
+    # Le code -1 (valeur manquante) pointe sur le 'Unknown' ajouté en fin de table
+    table = np.append(saisons.to_numpy(dtype=object), 'Unknown')
+    return pd.Series(table[codes], index=premiered.index)
+
+
+# ==========================================
+# PIPELINE DE NETTOYAGE PAR MORCEAUX
+# ==========================================
+
+COLONNES_A_SUPPRIMER = ['synopsis', 'trailer', 'producers']
+COLONNES_OBLIGATOIRES = ['score', 'episodes', 'scored_by', 'rank', "rating", "studios"]
+COLONNES_NUMERIQUES = ['score', 'episodes', 'scored_by', 'rank']
+# Entiers dans le CSV brut : lus en float64 pour le hash, réécrits sans ".0"
+COLONNES_ENTIERES = ['scored_by', 'rank']
+
+
+@instrumente("nettoyage_morceau")
+def nettoyer_chunk(chunk):
+    """Étapes de nettoyage de popular_anime.csv appliquées à un morceau du fichier."""
+    chunk["genres"] = chunk["genres"].fillna("Other")
+    chunk["episodes"] = chunk["episodes"].fillna(1)
+    chunk = chunk.drop(columns=COLONNES_A_SUPPRIMER, errors='ignore')
+
+    # Types fixes pour que les lignes identiques aient le même hash d'un morceau à l'autre
+    for col in COLONNES_NUMERIQUES:
+        chunk[col] = pd.to_numeric(chunk[col], errors='coerce').astype(np.float64)
+
+    chunk = chunk.dropna(subset=COLONNES_OBLIGATOIRES)
+    chunk["season_aired"] = saison_depuis_date(chunk["aired_from"])
+    return chunk
+
+
+def entiers_pour_ecriture(chunk):
+    """Colonnes entières remises en int64 avant écriture ("1" et non "1.0"), si toutes leurs valeurs le sont."""
+    entieres = {col: np.int64 for col in COLONNES_ENTIERES
+                if col in chunk.columns and (chunk[col] == np.floor(chunk[col])).all()}
+    return chunk.astype(entieres) if entieres else chunk
+
+
+@instrumente("nettoyage")
+def nettoyer_csv(chemin_entree, chemin_sortie="clean_anime.csv", taille_chunk=100_000):
+    """Nettoie le CSV brut morceau par morceau et écrit le résultat au fil de l'eau.
+
+    Les doublons sont détectés sur tout le fichier grâce au tableau trié des hash
+    (uint64) des lignes déjà écrites : la mémoire reste bornée par la taille d'un
+    morceau plus 8 octets par ligne distincte (le double le temps d'une fusion).
+    Un sketch de quantiles des scores écrits est enregistré à
+    côté du fichier propre (voir charger_sketch_scores). Renvoie un dictionnaire
+    de statistiques.
+    """
+    stats = {'lignes_lues': 0, 'lignes_ecrites': 0, 'doublons': 0}
+    sketch = SketchKLL(graine=0)
+    deja_vus = np.empty(0, dtype=np.uint64)
+    temporaire = chemin_sortie + ".tmp"
+
+    with open(temporaire, 'w', encoding='utf-8', newline='') as sortie:
+        for i, chunk in enumerate(pd.read_csv(chemin_entree, chunksize=taille_chunk)):
+            stats['lignes_lues'] += len(chunk)
+            chunk = nettoyer_chunk(chunk)
+
+            # Hash calculé avant l'ajout de la saison, comme le drop_duplicates d'origine
+            hashes = pd.util.hash_pandas_object(
+                chunk.drop(columns=["season_aired"]).astype(str), index=False).to_numpy()
+            # Première occurrence de chaque hash du morceau, puis exclusion des hash déjà écrits
+            uniques, premieres = np.unique(hashes, return_index=True)
+            nouveaux = ~np.isin(uniques, deja_vus, assume_unique=True)
+            garder = np.zeros(len(hashes), dtype=bool)
+            garder[premieres[nouveaux]] = True
+            # Deux suites triées : le tri stable se réduit à une fusion
+            deja_vus = np.concatenate([deja_vus, uniques[nouveaux]])
+            deja_vus.sort(kind='stable')
+
+            stats['doublons'] += int(len(chunk) - garder.sum())
+            chunk = chunk[garder]
+            entiers_pour_ecriture(chunk).to_csv(sortie, header=(i == 0), index=False)
+            stats['lignes_ecrites'] += len(chunk)
+            sketch.ajouter(chunk['score'])
+
+    os.replace(temporaire, chemin_sortie)
+    sauvegarder_sketch(sketch, chemin_sketch_scores(chemin_sortie))
+    annoter(**stats)
+    return stats
+
+
+# ==========================================
+# RAFRAÎCHISSEMENT INCRÉMENTAL DU FICHIER PROPRE
+# ==========================================
+# Les lignes de popular_anime.csv sont identifiées par leur nom (voir
+# ingestion.py). L'état enregistré à côté de clean_anime.csv ne garde que des
+# tableaux de taille fixe par ligne : clé, hash du contenu brut, hash de
+# doublon, score et position (début, longueur en octets) de la ligne nettoyée
+# dans clean_anime.csv. Le nouvel export est relu morceau par morceau, comme
+# dans nettoyer_csv : les lignes inchangées sont recopiées depuis l'ancien
+# fichier propre, seules les lignes ajoutées ou modifiées repassent par
+# nettoyer_chunk. Sans état utilisable, toutes les lignes sont nettoyées, par
+# morceaux : la mémoire reste bornée par la taille d'un morceau.
+
+VERSION_INSTANTANE = 3
+CHAMPS_INSTANTANE = ['hashes', 'doublons', 'scores', 'debuts', 'longueurs']
+
+
+def chemin_instantane_propre(chemin_propre):
+    return os.path.splitext(chemin_propre)[0] + ".instantane.pkl"
+
+
+def _etat_vide():
+    return {'version': VERSION_INSTANTANE, 'cles': np.empty(0, dtype=np.uint64),
+            'hashes': np.empty(0, dtype=np.uint64), 'doublons': np.empty(0, dtype=np.uint64),
+            'scores': np.empty(0), 'debuts': np.empty(0, dtype=np.int64),
+            'longueurs': np.empty(0, dtype=np.int64), 'fichier': None}
+
+
+def _signature(chemin):
+    # Les positions enregistrées ne valent que pour le fichier propre écrit avec l'état
+    infos = os.stat(chemin)
+    return infos.st_size, infos.st_mtime_ns
+
+
+class _Texte:
+    # csv.writer.writerow renvoie ce que renvoie write : ici la ligne formatée elle-même
+    def write(self, ligne):
+        return ligne
+
+
+def _lignes_csv(df):
+    """Texte CSV de chaque ligne (mêmes conventions que to_csv : NaN -> champ vide)."""
+    ecrivain = csv.writer(_Texte(), lineterminator='\n')
+    valeurs = df.astype(object).where(df.notna(), '').to_numpy()
+    return np.array([ecrivain.writerow(ligne) for ligne in valeurs], dtype=object)
+
+
+@contextlib.contextmanager
+def _texte_propre(chemin, etat):
+    # Ancien fichier propre projeté en mémoire (lu à la demande par le système)
+    if not len(etat['cles']) or not os.path.getsize(chemin):
+        yield None
+        return
+    with open(chemin, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as texte:
+        yield texte
+
+
+class _LignesEcrites:
+    """Hash de doublon (triés) des lignes déjà écrites et position de leur texte."""
+
+    def __init__(self):
+        self.hashes = np.empty(0, dtype=np.uint64)
+        self.debuts = np.empty(0, dtype=np.int64)
+        self.longueurs = np.empty(0, dtype=np.int64)
+
+    def ajouter(self, hashes, debuts, longueurs):
+        # Deux suites triées : le tri stable se réduit à une fusion
+        hashes = np.concatenate([self.hashes, hashes])
+        ordre = np.argsort(hashes, kind='stable')
+        self.hashes = hashes[ordre]
+        self.debuts = np.concatenate([self.debuts, debuts])[ordre]
+        self.longueurs = np.concatenate([self.longueurs, longueurs])[ordre]
+
+
+def _morceau_propre(chunk, inchangee, position, etat, texte):
+    """Lignes d'un morceau qui survivent au nettoyage, avec hash de doublon, score et texte CSV.
+
+    Les lignes inchangées reprennent tout de l'état et de l'ancien fichier
+    propre ; les autres passent par nettoyer_chunk.
+    """
+    n = len(chunk)
+    garde = np.zeros(n, dtype=bool)
+    doublons = np.zeros(n, dtype=np.uint64)
+    scores = np.full(n, np.nan)
+    lignes = np.empty(n, dtype=object)
+
+    anciennes = np.flatnonzero(inchangee)
+    anciennes = anciennes[etat['debuts'][position[anciennes]] >= 0]
+    if len(anciennes):
+        pos = position[anciennes]
+        garde[anciennes] = True
+        doublons[anciennes] = etat['doublons'][pos]
+        scores[anciennes] = etat['scores'][pos]
+        lignes[anciennes] = np.array([texte[d:d + l] for d, l in zip(etat['debuts'][pos].tolist(),
+                                                                      etat['longueurs'][pos].tolist())],
+                                     dtype=object)
+
+    if not inchangee.all():
+        nettoyees = nettoyer_chunk(chunk[~inchangee])
+        rangs = chunk.index.get_indexer(nettoyees.index)
+        garde[rangs] = True
+        # Hash des doublons calculé comme dans nettoyer_csv (sans la saison)
+        doublons[rangs] = pd.util.hash_pandas_object(
+            nettoyees.drop(columns=["season_aired"]).astype(str), index=False).to_numpy()
+        scores[rangs] = nettoyees['score'].to_numpy()
+        lignes[rangs] = np.array([ligne.encode('utf-8') for ligne in
+                                  _lignes_csv(entiers_pour_ecriture(nettoyees))], dtype=object)
+    return garde, doublons, scores, lignes
+
+
+@instrumente("nettoyage")
+def rafraichir_propre(chemin_entree, chemin_sortie="clean_anime.csv", taille_chunk=100_000):
+    """Met à jour clean_anime.csv en ne renettoyant que les lignes changées depuis l'export précédent.
+
+    Même résultat que nettoyer_csv (ordre et doublons compris). Renvoie un
+    dictionnaire de statistiques.
+    """
+    chemin_etat = chemin_instantane_propre(chemin_sortie)
+    etat = charger_etat(chemin_etat)
+    if (etat is None or etat.get('version') != VERSION_INSTANTANE or not os.path.exists(chemin_sortie)
+            or etat['fichier'] != _signature(chemin_sortie)):
+        etat = _etat_vide()
+
+    stats = {'lignes': 0, 'inserees': 0, 'modifiees': 0, 'supprimees': 0, 'lignes_ecrites': 0, 'doublons': 0}
+    morceaux = {champ: [] for champ in ['cles'] + CHAMPS_INSTANTANE}
+    ecrites = _LignesEcrites()
+    sketch = SketchKLL(graine=0)
+    occurrences = pd.Series(dtype=np.int64)
+    connues = 0
+    temporaire = chemin_sortie + ".tmp"
+
+    # Tout en texte : le hash d'une ligne ne dépend pas des types devinés sur son morceau.
+    # Les colonnes supprimées par le nettoyage ne sont ni lues ni hachées.
+    lecteur = pd.read_csv(chemin_entree, dtype=object, chunksize=taille_chunk,
+                          usecols=lambda c: c not in COLONNES_A_SUPPRIMER)
+    with _texte_propre(chemin_sortie, etat) as texte, open(temporaire, 'wb') as sortie:
+        for chunk in lecteur:
+            if not sortie.tell():
+                colonnes = nettoyer_chunk(chunk.iloc[:0].copy()).columns
+                sortie.write(_lignes_csv(pd.DataFrame([list(colonnes)]))[0].encode('utf-8'))
+
+            cles, hashes, occurrences = empreintes_morceau(chunk, 'name', occurrences)
+            position, trouvee = rechercher_cles(etat['cles'], cles)
+            inchangee = trouvee & (etat['hashes'][position] == hashes) if len(etat['cles']) else trouvee
+            stats['lignes'] += len(chunk)
+            stats['inserees'] += int((~trouvee).sum())
+            stats['modifiees'] += int((trouvee & ~inchangee).sum())
+            connues += int(trouvee.sum())
+
+            garde, doublons, scores, lignes = _morceau_propre(chunk, inchangee, position, etat, texte)
+
+            # Première occurrence de chaque contenu, hors contenus déjà écrits
+            candidates = np.flatnonzero(garde)
+            uniques, premieres, inverse = np.unique(doublons[candidates], return_index=True, return_inverse=True)
+            position_ecrite, deja = rechercher_cles(ecrites.hashes, uniques)
+            nouveaux = np.flatnonzero(~deja)
+            nouveaux = nouveaux[np.argsort(premieres[nouveaux])]
+            a_ecrire = candidates[premieres[nouveaux]]
+
+            longueurs = np.array([len(ligne) for ligne in lignes[a_ecrire]], dtype=np.int64)
+            debut = sortie.tell()
+            sortie.write(b"".join(lignes[a_ecrire]))
+            sketch.ajouter(scores[a_ecrire])
+
+            # Position du texte de chaque contenu (écrit dans ce morceau ou avant),
+            # que les doublons partagent avec leur première occurrence
+            debut_unique = np.empty(len(uniques), dtype=np.int64)
+            longueur_unique = np.empty(len(uniques), dtype=np.int64)
+            debut_unique[deja] = ecrites.debuts[position_ecrite[deja]]
+            longueur_unique[deja] = ecrites.longueurs[position_ecrite[deja]]
+            debut_unique[nouveaux] = debut + np.cumsum(longueurs) - longueurs
+            longueur_unique[nouveaux] = longueurs
+            ecrites.ajouter(uniques[nouveaux], debut_unique[nouveaux], longueurs)
+
+            debuts = np.full(len(chunk), -1, dtype=np.int64)
+            longueurs_lignes = np.zeros(len(chunk), dtype=np.int64)
+            debuts[candidates] = debut_unique[inverse]
+            longueurs_lignes[candidates] = longueur_unique[inverse]
+
+            for champ, valeurs in zip(['cles'] + CHAMPS_INSTANTANE,
+                                      [cles, hashes, doublons, scores, debuts, longueurs_lignes]):
+                morceaux[champ].append(valeurs)
+            stats['lignes_ecrites'] += len(a_ecrire)
+            stats['doublons'] += len(candidates) - len(a_ecrire)
+
+        if not sortie.tell():
+            sortie.write(b"\n")
+    stats['supprimees'] = len(etat['cles']) - connues
+
+    if etat['fichier'] is not None and not (stats['inserees'] or stats['modifiees'] or stats['supprimees']):
+        # Rien n'a changé : le fichier propre (et son sketch) sont seulement marqués à jour
+        os.remove(temporaire)
+        os.utime(chemin_sortie)
+        if os.path.exists(chemin_sketch_scores(chemin_sortie)):
+            os.utime(chemin_sketch_scores(chemin_sortie))
+        etat['fichier'] = _signature(chemin_sortie)
+    else:
+        os.replace(temporaire, chemin_sortie)
+        sauvegarder_sketch(sketch, chemin_sketch_scores(chemin_sortie))
+        cles = np.concatenate(morceaux['cles']) if morceaux['cles'] else np.empty(0, dtype=np.uint64)
+        ordre = np.argsort(cles)
+        etat = _etat_vide()
+        etat['cles'] = cles[ordre]
+        for champ in CHAMPS_INSTANTANE:
+            if morceaux[champ]:
+                etat[champ] = np.concatenate(morceaux[champ])[ordre]
+        etat['fichier'] = _signature(chemin_sortie)
+    sauvegarder_etat(etat, chemin_etat)
+    annoter(**stats)
+    return stats
+
+
+def _chemin_propre(chemin_brut, chemin_propre, taille_chunk):
+    # Rafraîchit clean_anime.csv s'il est absent ou plus ancien que le CSV brut
+    if chemin_propre is None:
+        chemin_propre = os.path.join(os.path.dirname(chemin_brut), "clean_anime.csv")
+    if (not os.path.exists(chemin_propre)
+            or os.path.getmtime(chemin_propre) < os.path.getmtime(chemin_brut)):
+        rafraichir_propre(chemin_brut, chemin_propre, taille_chunk)
+    return chemin_propre
+
+
+def charger_donnees_propres(chemin_brut, chemin_propre=None, taille_chunk=100_000):
+    """Lit clean_anime.csv, rafraîchi s'il est absent ou plus ancien que le CSV brut."""
+    return pd.read_csv(_chemin_propre(chemin_brut, chemin_propre, taille_chunk))
+
+
+# ==========================================
+# SKETCH DES SCORES DU FICHIER PROPRE
+# ==========================================
+
+def chemin_sketch_scores(chemin_propre):
+    return os.path.splitext(chemin_propre)[0] + ".scores.npz"
+
+
+def sauvegarder_sketch(sketch, chemin):
+    temporaire = chemin + ".tmp"
+    with open(temporaire, 'wb') as f:
+        np.savez(f, **sketch.etat())
+    os.replace(temporaire, chemin)
+
+
+def charger_sketch_scores(chemin_brut, chemin_propre=None, taille_chunk=100_000):
+    """Sketch de quantiles des scores de clean_anime.csv, produit par le pipeline de nettoyage.
+
+    Pour un fichier propre antérieur au sketch, celui-ci est reconstruit par morceaux.
+    """
+    chemin_propre = _chemin_propre(chemin_brut, chemin_propre, taille_chunk)
+    chemin = chemin_sketch_scores(chemin_propre)
+    if os.path.exists(chemin) and os.path.getmtime(chemin) >= os.path.getmtime(chemin_propre):
+        with np.load(chemin) as etat:
+            return SketchKLL.depuis_etat(**{cle: etat[cle] for cle in etat.files})
+
+    sketch = SketchKLL(graine=0)
+    for chunk in pd.read_csv(chemin_propre, usecols=['score'], chunksize=taille_chunk):
+        sketch.ajouter(chunk['score'])
+    sauvegarder_sketch(sketch, chemin)
+    return sketch
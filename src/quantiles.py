@@ -0,0 +1,125 @@
+import numpy as np
+
+# ==========================================
+# SKETCH DE QUANTILES FUSIONNABLE (KLL)
+# ==========================================
+# Résumé de taille bornée d'une distribution de scores, alimenté morceau par
+# morceau et fusionnable entre workers. Chaque niveau h contient des valeurs de
+# poids 2^h ; quand un niveau déborde, il est trié et une valeur sur deux
+# (décalage aléatoire) monte au niveau supérieur. L'erreur de rang est de
+# l'ordre de 1.7 / k (environ 1 % pour k = 200) ; tant que le nombre de valeurs
+# ne dépasse pas k, le sketch est exact. NumPy seul, comme artefact.py.
+
+K_PAR_DEFAUT = 200
+FACTEUR_CAPACITE = 2 / 3
+
+
+class SketchKLL:
+    def __init__(self, k=K_PAR_DEFAUT, graine=None):
+        self.k = k
+        self.n = 0
+        self.niveaux = [np.empty(0)]
+        self.rng = np.random.default_rng(graine)
+
+    def _capacite(self, h):
+        # Les niveaux les plus hauts gardent k valeurs, les plus bas moins
+        profondeur = len(self.niveaux) - 1 - h
+        return max(2, int(np.ceil(self.k * FACTEUR_CAPACITE ** profondeur)))
+
+    def _compresser(self):
+        h = 0
+        while h < len(self.niveaux):
+            niveau = self.niveaux[h]
+            if len(niveau) <= self._capacite(h):
+                h += 1
+                continue
+            # Tri stable : les moitiés déjà triées sont fusionnées rapidement
+            valeurs = np.sort(niveau, kind='stable')
+            reste = valeurs[len(valeurs) - len(valeurs) % 2:]
+            paires = valeurs[:len(valeurs) - len(valeurs) % 2]
+            promues = paires[int(self.rng.integers(2))::2]
+            self.niveaux[h] = reste
+            if h + 1 == len(self.niveaux):
+                self.niveaux.append(np.empty(0))
+            self.niveaux[h + 1] = np.concatenate([self.niveaux[h + 1], promues])
+            # Les capacités dépendent du nombre de niveaux : on revérifie depuis le bas
+            h = 0
+
+    def ajouter(self, valeurs):
+        """Ajoute un lot de valeurs (les NaN sont ignorés) ; renvoie le sketch."""
+        valeurs = np.asarray(valeurs, dtype=np.float64).ravel()
+        valeurs = valeurs[~np.isnan(valeurs)]
+        if len(valeurs):
+            self.n += len(valeurs)
+            self.niveaux[0] = np.concatenate([self.niveaux[0], valeurs])
+            self._compresser()
+        return self
+
+    def fusionner(self, autre):
+        """Combine le sketch d'un autre morceau ou d'un autre worker ; renvoie le sketch."""
+        while len(self.niveaux) < len(autre.niveaux):
+            self.niveaux.append(np.empty(0))
+        for h, niveau in enumerate(autre.niveaux):
+            self.niveaux[h] = np.concatenate([self.niveaux[h], niveau])
+        self.n += autre.n
+        self._compresser()
+        return self
+
+    def __len__(self):
+        return self.n
+
+    def taille_memoire(self):
+        """Nombre de valeurs conservées (indépendant de n, à un log près)."""
+        return sum(len(niveau) for niveau in self.niveaux)
+
+    def _trie(self):
+        valeurs = np.concatenate(self.niveaux)
+        poids = np.concatenate([np.full(len(niveau), 2.0 ** h) for h, niveau in enumerate(self.niveaux)])
+        ordre = np.argsort(valeurs, kind='stable')
+        return valeurs[ordre], np.cumsum(poids[ordre])
+
+    def valeur_de_rang(self, rang):
+        """Valeur de rang croissant donné (1 = minimum), estimée."""
+        if not self.n:
+            return float('nan')
+        valeurs, cumul = self._trie()
+        # Le poids total peut différer légèrement de n après compression : on rééchelonne
+        cible = rang * cumul[-1] / self.n
+        return float(valeurs[min(np.searchsorted(cumul, cible, side='left'), len(valeurs) - 1)])
+
+    def quantile(self, q):
+        """Quantile q (entre 0 et 1) : plus petite valeur dont le rang atteint q * n."""
+        return self.valeur_de_rang(max(1, int(np.ceil(q * self.n))))
+
+    def rang(self, x):
+        """Proportion estimée des valeurs inférieures ou égales à x."""
+        if not self.n:
+            return float('nan')
+        valeurs, cumul = self._trie()
+        i = np.searchsorted(valeurs, x, side='right')
+        return float(cumul[i - 1] / cumul[-1]) if i else 0.0
+
+    def seuil_top(self, proportion=0.10):
+        """Score minimal du top `proportion` : la int(n * proportion)-ième meilleure valeur."""
+        nombre = max(1, int(self.n * proportion))
+        return self.valeur_de_rang(self.n - nombre + 1)
+
+    def etat(self):
+        """Tableaux (valeurs, niveaux) pour la sauvegarde, voir depuis_etat."""
+        valeurs = np.concatenate(self.niveaux)
+        niveaux = np.concatenate([np.full(len(niveau), h, dtype=np.int16) for h, niveau in enumerate(self.niveaux)])
+        return {'k': self.k, 'n': self.n, 'valeurs': valeurs, 'niveaux': niveaux}
+
+    @staticmethod
+    def depuis_etat(k, n, valeurs, niveaux):
+        sketch = SketchKLL(int(k))
+        sketch.n = int(n)
+        niveaux = np.asarray(niveaux)
+        hauteur = int(niveaux.max()) + 1 if len(niveaux) else 1
+        sketch.niveaux = [np.asarray(valeurs, dtype=np.float64)[niveaux == h] for h in range(hauteur)]
+        return sketch
+
+
+def classer_top(scores, seuil):
+    """Vecteur booléen : score au moins égal au seuil du top (voir SketchKLL.seuil_top)."""
+    return np.asarray(scores, dtype=np.float64) >= seuil
@@ -0,0 +1,86 @@
+from bisect import bisect_left
+
+import numpy as np
+
+# ==========================================
+# INDEX DE RECHERCHE PAR PRÉFIXE / SOUS-CHAÎNE
+# ==========================================
+# Construit une fois à partir des clés du modèle (studios, genres...) ou des
+# titres du DataFrame. Un préfixe est trouvé par dichotomie dans la liste triée ;
+# une sous-chaîne par intersection des listes de n-grammes (1 à 3 caractères),
+# en partant de la plus courte, puis vérification sur les seuls candidats.
+
+TAILLE_NGRAMME = 3
+
+
+def _normaliser(texte):
+    return " ".join(str(texte).lower().split())
+
+
+class IndexRecherche:
+    def __init__(self, valeurs):
+        # Dédoublonnage et tri sur la forme normalisée (casse et espaces ignorés)
+        paires = sorted({(_normaliser(v), str(v)) for v in valeurs})
+        self.normalisees = [n for n, _ in paires]
+        self.valeurs = [v for _, v in paires]
+
+        postings = {}
+        for i, texte in enumerate(self.normalisees):
+            grammes = {texte[d:d + n] for n in range(1, TAILLE_NGRAMME + 1)
+                       for d in range(len(texte) - n + 1)}
+            for g in grammes:
+                postings.setdefault(g, []).append(i)
+        # Identifiants croissants : les résultats sortent dans l'ordre alphabétique
+        self.postings = {g: np.array(ids, dtype=np.int32) for g, ids in postings.items()}
+
+    def __len__(self):
+        return len(self.valeurs)
+
+    def prefixe(self, requete, limite=None):
+        """Valeurs commençant par la requête, dans l'ordre alphabétique."""
+        requete = _normaliser(requete)
+        resultats = []
+        i = bisect_left(self.normalisees, requete)
+        while i < len(self.normalisees) and self.normalisees[i].startswith(requete):
+            resultats.append(self.valeurs[i])
+            if limite is not None and len(resultats) >= limite:
+                break
+            i += 1
+        return resultats
+
+    def _candidats(self, requete):
+        if len(requete) <= TAILLE_NGRAMME:
+            return self.postings.get(requete, np.empty(0, dtype=np.int32))
+        listes = []
+        for d in range(len(requete) - TAILLE_NGRAMME + 1):
+            ids = self.postings.get(requete[d:d + TAILLE_NGRAMME])
+            if ids is None:
+                return np.empty(0, dtype=np.int32)
+            listes.append(ids)
+        listes.sort(key=len)
+        candidats = listes[0]
+        for ids in listes[1:]:
+            candidats = np.intersect1d(candidats, ids, assume_unique=True)
+            if not len(candidats):
+                break
+        return candidats
+
+    def chercher(self, requete, limite=None):
+        """Préfixes d'abord, puis les autres valeurs contenant la requête.
+
+        Une requête vide renvoie toutes les valeurs (jusqu'à la limite).
+        """
+        requete = _normaliser(requete)
+        if not requete:
+            return self.valeurs[:limite]
+
+        resultats = self.prefixe(requete, limite)
+        if limite is not None and len(resultats) >= limite:
+            return resultats
+        for i in self._candidats(requete):
+            texte = self.normalisees[i]
+            if requete in texte and not texte.startswith(requete):
+                resultats.append(self.valeurs[i])
+                if limite is not None and len(resultats) >= limite:
+                    break
+        return resultats
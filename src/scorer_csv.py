@@ -0,0 +1,89 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from modele_compile import DIMENSIONS, NOMS_DIMENSIONS, ModeleCompile
+
+# ====================================================================
+# NOTATION EN LIGNE DE COMMANDE D'UN CSV DE PROFILS
+# ====================================================================
+# Le CSV d'entrée (colonnes studio, source, type, rating, genre, season) est
+# lu par morceaux, noté avec le modèle additif ou le modèle OLS, et chaque
+# morceau est écrit dans le fichier de sortie aussitôt : la mémoire ne dépend
+# que de la taille d'un morceau.
+#
+#   python scorer_csv.py profils.csv notes.csv --modele additif --top 3
+
+# Colonne du CSV d'entrée pour chaque dimension du modèle compilé
+COLONNES_PROFIL = {'studio': 'studio', 'source': 'source', 'type': 'type',
+                   'rating': 'rating', 'genre': 'genre', 'saison': 'season'}
+LIBELLES = {dim: libelle for dim, _, libelle in DIMENSIONS}
+
+
+def charger_modele(type_modele, csv_additif, csv_ols):
+    """Modèle compilé : additif (artefact ou entraînement) ou coefficients OLS."""
+    if type_modele == 'additif':
+        from script import obtenir_modele
+        modele, _ = obtenir_modele(csv_additif)
+    else:
+        from modele_ols import (ajuster_ols_creux, categories_reference, charger_donnees_ols, matrices_ols,
+                                modele_additif_depuis_ols)
+        df = charger_donnees_ols(csv_ols)
+        X, Y, features = matrices_ols(df)
+        modele = modele_additif_depuis_ols(ajuster_ols_creux(X, Y, features).params, categories_reference(df))
+    if modele is None:
+        raise SystemExit("Impossible de charger le modèle.")
+    return ModeleCompile(modele)
+
+
+def noter_chunk(modele, chunk, top_n=0):
+    profils = {dim: chunk[col].astype(str).tolist() if col in chunk.columns else [""] * len(chunk)
+               for dim, col in COLONNES_PROFIL.items()}
+    sortie = chunk.copy()
+    if not top_n:
+        sortie['score'] = modele.predire(profils)
+        return sortie
+
+    scores, contributions = modele.predire(profils, avec_contributions=True)
+    sortie['score'] = scores
+
+    # Les N contributions les plus fortes en valeur absolue, ligne par ligne
+    matrice = np.column_stack([contributions[dim] for dim in NOMS_DIMENSIONS])
+    ordre = np.argsort(-np.abs(matrice), axis=1)[:, :top_n]
+    libelles = np.array([LIBELLES[dim] for dim in NOMS_DIMENSIONS], dtype=object)
+    for k in range(ordre.shape[1]):
+        sortie[f'top{k + 1}_dimension'] = libelles[ordre[:, k]]
+        sortie[f'top{k + 1}_contribution'] = np.take_along_axis(matrice, ordre[:, k:k + 1], axis=1)[:, 0]
+    return sortie
+
+
+def scorer_csv(modele, chemin_entree, chemin_sortie, taille_chunk=200_000, top_n=0):
+    """Note le CSV d'entrée morceau par morceau ; renvoie le nombre de lignes notées."""
+    total = 0
+    lecteur = pd.read_csv(chemin_entree, chunksize=taille_chunk, dtype=str, keep_default_na=False)
+    with open(chemin_sortie, 'w', encoding='utf-8', newline='') as sortie:
+        for i, chunk in enumerate(lecteur):
+            noter_chunk(modele, chunk, top_n).to_csv(sortie, header=(i == 0), index=False,
+                                                     float_format="%.4f")
+            total += len(chunk)
+    return total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Note un CSV de profils hypothétiques")
+    parser.add_argument('entree', help="CSV avec les colonnes studio, source, type, rating, genre, season")
+    parser.add_argument('sortie')
+    parser.add_argument('--modele', choices=['additif', 'ols'], default='additif')
+    parser.add_argument('--csv-additif', default='anime-dataset-2023.csv')
+    parser.add_argument('--csv-ols', default='popular_anime.csv')
+    parser.add_argument('--chunk', type=int, default=200_000)
+    parser.add_argument('--top', type=int, default=0, help="Nombre de contributions à écrire par ligne")
+    args = parser.parse_args()
+
+    modele = charger_modele(args.modele, args.csv_additif, args.csv_ols)
+    debut = time.perf_counter()
+    lignes = scorer_csv(modele, args.entree, args.sortie, args.chunk, args.top)
+    duree = time.perf_counter() - debut
+    print(f"{lignes} profils notés en {duree:.2f} s ({lignes / max(duree, 1e-9):.0f} profils/s)")
@@ -1,41 +1,184 @@
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import tkinter as tk
-from tkinter import ttk, messagebox
 import random 
+import argparse
+import os
+import pickle
+import queue
+import threading
+
+import artefact
+from instrumentation import annoter, est_actif, instrumente, resume_texte
+from meilleurs_profils import meilleurs_profils
+from modele_compile import DIMENSIONS, NOMS_DIMENSIONS, ModeleCompile
+from quantiles import SketchKLL, classer_top
+from nettoyage import saison_depuis_premiered
+from recherche import IndexRecherche
+from sensibilite import balayage, grille
+from simulation import rang_dans_simulation, simuler_profils
+
+# tkinter, matplotlib et seaborn ne sont importés qu'à leur première utilisation :
+# les chemins sans interface (service, notation en lot) démarrent plus vite et
+# fonctionnent sur une machine sans Tk.
+tk = ttk = messagebox = None
+
+def _charger_tkinter():
+    global tk, ttk, messagebox
+    if tk is None:
+        import tkinter
+        from tkinter import ttk as module_ttk, messagebox as module_messagebox
+        tk, ttk, messagebox = tkinter, module_ttk, module_messagebox
 
 # ==========================================
 # 1. CHARGEMENT ET PRÉPARATION
 # ==========================================
 
-def charger_et_preparer_donnees(chemin_csv):
+# Colonnes réellement utilisées par le modèle (mode "cache") ; Name sert à la recherche de titres
+COLONNES_MODELE = ['Name', 'Score', 'Genres', 'Type', 'Premiered', 'Studios', 'Source', 'Rating']
+COLONNES_TEXTE = ['Studios', 'Type', 'Source', 'Rating', 'Genres']
+# À incrémenter quand le contenu du DataFrame mis en cache change
+VERSION_CACHE_DONNEES = 3
+
+# Genres de chaque ligne en masque de bits : le bit i correspond à df.attrs['genres'][i]
+COLONNE_MASQUE_GENRES = 'genres_masque'
+MAX_GENRES_MASQUE = 64
+
+def categorie_propre(valeurs):
+    """Colonne texte -> catégorielle épurée (strip, 'nan' pour les manquants).
+
+    Seules les valeurs distinctes sont converties et nettoyées, puis réindexées par code.
+    """
+    codes, uniques = pd.factorize(valeurs)
+    propres = pd.Series(np.asarray(uniques, dtype=object), dtype=object).astype(str).str.strip().to_numpy(dtype=object)
+    if (codes < 0).any():
+        # Le code -1 pointe sur le 'nan' ajouté en fin de table, comme fillna('nan')
+        propres = np.append(propres, 'nan')
+    categories, inverse = np.unique(propres, return_inverse=True)
+    return pd.Categorical.from_codes(inverse[codes], categories=categories)
+
+def masques_genres(genres):
+    """Vocabulaire trié des genres et masque de bits (uint64) de chaque ligne.
+
+    Seules les combinaisons distinctes sont découpées. Au-delà de
+    MAX_GENRES_MASQUE genres, renvoie (vocabulaire, None).
+    """
+    if not isinstance(genres.dtype, pd.CategoricalDtype):
+        genres = genres.astype('category')
+    listes = [{g.strip() for g in str(c).split(',')} for c in genres.cat.categories]
+    vocabulaire = sorted(set().union(*listes))
+    if len(vocabulaire) > MAX_GENRES_MASQUE:
+        return vocabulaire, None
+    position = {g: i for i, g in enumerate(vocabulaire)}
+    # Dernière case : code -1 (valeur manquante), aucun genre
+    table = np.array([sum(1 << position[g] for g in l) for l in listes] + [0], dtype=np.uint64)
+    return vocabulaire, table[genres.cat.codes.to_numpy()]
+
+def masques_du_df(df):
+    """Vocabulaire et masques des genres : colonne déjà calculée si elle existe, sinon calcul."""
+    if COLONNE_MASQUE_GENRES in df.columns and 'genres' in df.attrs:
+        return df.attrs['genres'], df[COLONNE_MASQUE_GENRES].to_numpy()
+    return masques_genres(df['Genres'])
+
+def matrice_genres(masques, nb_genres):
+    """Matrice d'appartenance (lignes x genres, uint8) : tous les bits dépliés en une passe."""
+    octets = np.ascontiguousarray(masques, dtype='<u8').view(np.uint8).reshape(-1, 8)
+    octets = octets[:, :(nb_genres + 7) // 8]
+    return np.unpackbits(octets, axis=1, bitorder='little')[:, :nb_genres]
+
+def preparer_donnees(df, categories=False):
+    """Nettoyage commun : saison, score numérique, colonnes texte épurées.
+
+    Avec categories=True, les colonnes texte deviennent des catégorielles (codes
+    entiers + dictionnaire de valeurs) et les genres sont aussi rangés en masque
+    de bits dans COLONNE_MASQUE_GENRES.
+    """
+    df['season_cleaned'] = saison_depuis_premiered(df['Premiered'])
+    df['Score'] = pd.to_numeric(df['Score'], errors='coerce')
+    
+    for col in COLONNES_TEXTE:
+        if col not in df.columns:
+            df[col] = "Unknown"
+        elif categories:
+            df[col] = categorie_propre(df[col])
+        else:
+            df[col] = df[col].astype(object).fillna('nan').astype(str).str.strip()
+
+    if categories:
+        compacter_donnees(df)
+    
+    # On retire les lignes sans score pour l'apprentissage
+    return df.dropna(subset=['Score'])
+
+def compacter_donnees(df):
+    """Colonnes texte (déjà épurées) en catégorielles et genres en masque de bits, sur place."""
+    for col in COLONNES_TEXTE + ['season_cleaned']:
+        df[col] = df[col].astype('category')
+    df.attrs.pop('genres', None)
+    vocabulaire, masques = masques_genres(df['Genres'])
+    if masques is not None:
+        df[COLONNE_MASQUE_GENRES] = masques
+        df.attrs['genres'] = vocabulaire
+    elif COLONNE_MASQUE_GENRES in df.columns:
+        df.drop(columns=[COLONNE_MASQUE_GENRES], inplace=True)
+    return df
+
+def chemin_cache_donnees(chemin_csv):
+    return os.path.splitext(chemin_csv)[0] + ".cache.pkl"
+
+def _lire_cache_donnees(chemin_cache, stat):
+    # Le cache n'est valable que si le CSV n'a changé ni de taille ni de date
+    try:
+        contenu = pd.read_pickle(chemin_cache)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        return None
+    if contenu.get('version') != VERSION_CACHE_DONNEES:
+        return None
+    if contenu.get('csv_taille') != stat.st_size or contenu.get('csv_mtime_ns') != stat.st_mtime_ns:
+        return None
+    return contenu['df']
+
+@instrumente("chargement")
+def charger_et_preparer_donnees(chemin_csv, utiliser_cache=True, afficher_erreurs=True):
+    """Charge et nettoie le CSV.
+
+    Les colonnes texte sont stockées en catégories et les genres en masque de bits.
+    Avec utiliser_cache=True, seules les colonnes du modèle sont lues et le résultat
+    est mis en cache à côté du CSV.
+    Avec afficher_erreurs=False (hors du thread Tk), les erreurs sont propagées.
+    """
     try:
         try:
-            df = pd.read_csv(chemin_csv)
+            stat = os.stat(chemin_csv)
         except FileNotFoundError:
             print("Fichier introuvable.")
             return None
 
-        # Nettoyage
-        def extract_season(premiered_str):
-            if isinstance(premiered_str, str) and premiered_str != 'UNKNOWN':
-                return premiered_str.split(' ')[0].capitalize()
-            return 'Unknown'
+        if not utiliser_cache:
+            return preparer_donnees(pd.read_csv(chemin_csv), categories=True)
 
-        df['season_cleaned'] = df['Premiered'].apply(extract_season)
-        df['Score'] = pd.to_numeric(df['Score'], errors='coerce')
-        
-        cols_text = ['Studios', 'Type', 'Source', 'Rating', 'Genres']
-        for col in cols_text:
-            if col in df.columns:
-                df[col] = df[col].astype(str).str.strip()
-            else:
-                df[col] = "Unknown"
-        
-        # On retire les lignes sans score pour l'apprentissage
-        return df.dropna(subset=['Score'])
+        chemin_cache = chemin_cache_donnees(chemin_csv)
+        df = _lire_cache_donnees(chemin_cache, stat)
+        if df is not None:
+            annoter(lignes=len(df), cache=True)
+            return df
+
+        df = pd.read_csv(chemin_csv, usecols=lambda c: c in COLONNES_MODELE,
+                         dtype={col: object for col in COLONNES_MODELE})
+        df = preparer_donnees(df, categories=True).drop(columns=['Premiered']).reset_index(drop=True)
+
+        try:
+            temporaire = chemin_cache + ".tmp"
+            pd.to_pickle({'version': VERSION_CACHE_DONNEES, 'csv_taille': stat.st_size,
+                          'csv_mtime_ns': stat.st_mtime_ns, 'df': df}, temporaire)
+            os.replace(temporaire, chemin_cache)
+        except OSError as e:
+            print(f"Impossible d'écrire le cache : {e}")
+        annoter(lignes=len(df), cache=False)
+        return df
     except Exception as e:
+        if not afficher_erreurs:
+            raise
+        _charger_tkinter()
         messagebox.showerror("Erreur Fatale", f"Impossible de traiter les données : {e}")
         return None
 
@@ -43,12 +186,42 @@ def charger_et_preparer_donnees(chemin_csv):
 # 2. ENTRAÎNEMENT DU MODÈLE
 # ==========================================
 
-def entrainer_modele(df):  
-    print(df.shape)
+# Liste noire des genres à ignorer
+GENRES_A_IGNORER = ["Award Winning", "UNKNOWN", "nan"]
+
+# Colonne du DataFrame associée à chaque ajustement du modèle (hors genres)
+COLONNES_AJUSTEMENTS = {
+    'adj_studio': 'Studios',
+    'adj_season': 'season_cleaned',
+    'adj_type': 'Type',
+    'adj_source': 'Source',
+    'adj_rating': 'Rating',
+}
+
+def paires_genres(df):
+    """Couples (genre, Score, position de la ligne), un par genre distinct de chaque ligne."""
+    vocabulaire, masques = masques_du_df(df)
+    if masques is not None:
+        # Tous les couples d'un coup, rangés par genre puis par ligne
+        codes, positions = np.nonzero(matrice_genres(masques, len(vocabulaire)).T)
+        return pd.DataFrame({'genre': np.array(vocabulaire, dtype=object)[codes],
+                             'Score': df['Score'].to_numpy()[positions],
+                             'ligne': positions})
+
+    genres = df['Genres'].astype(str).str.split(',').reset_index(drop=True).explode().str.strip()
+    paires = pd.DataFrame({'genre': genres.to_numpy(),
+                           'Score': df['Score'].to_numpy()[genres.index.to_numpy()],
+                           'ligne': genres.index.to_numpy()})
+    # Un genre répété dans une même ligne ne compte qu'une fois
+    return paires.drop_duplicates(subset=['ligne', 'genre'])
+
+@instrumente("entrainement")
+def entrainer_modele(df, min_count=2, genres_a_ignorer=GENRES_A_IGNORER):  
+    annoter(lignes=len(df))
     base_score = df['Score'].mean()
     
-    def get_adjustments(column_name, min_count=2):
-        means = df.groupby(column_name)['Score'].mean()
+    def get_adjustments(column_name):
+        means = df.groupby(column_name, observed=True)['Score'].mean()
         counts = df[column_name].value_counts()
         valid_cats = counts[counts >= min_count].index
         
@@ -70,27 +243,66 @@ def entrainer_modele(df):
         'adj_genre': {}
     }
     
-    # Gestion des genres
-    all_genres = set()
-    for g_str in df['Genres']:
-        all_genres.update([g.strip() for g in g_str.split(',')])
-
-    # Liste noire des genres à ignorer
-    genres_a_ignorer = ["Award Winning", "UNKNOWN", "nan"]
-
-    for genre in all_genres:
-        if genre in genres_a_ignorer:
-            continue
-        mask = df['Genres'].str.contains(genre, regex=False)
-        if mask.sum() >= 1: 
-            model['adj_genre'][genre] = df[mask]['Score'].mean() - base_score
-            
+    # Gestion des genres : moyenne des lignes portant le bit de chaque genre
+    vocabulaire, masques = masques_du_df(df)
+    if masques is not None:
+        # Effectifs et sommes de tous les genres en un seul produit matriciel
+        appartenance = matrice_genres(masques, len(vocabulaire))
+        scores = df['Score'].to_numpy(dtype=float)
+        effectifs = appartenance.sum(axis=0)
+        sommes = scores @ appartenance
+        for genre, effectif, somme in zip(vocabulaire, effectifs, sommes):
+            if genre not in genres_a_ignorer and effectif:
+                model['adj_genre'][genre] = somme / effectif - base_score
+    else:
+        paires = paires_genres(df)
+        paires = paires[~paires['genre'].isin(genres_a_ignorer)]
+        moyennes = paires.groupby('genre')['Score'].mean() - base_score
+        model['adj_genre'] = moyennes.to_dict()
+
+    # Distribution des scores réels : seuils du top X % sans tri complet
+    model['sketch_scores'] = SketchKLL(graine=0).ajouter(df['Score'])
     return model
 
+@instrumente("modele")
+def obtenir_modele(chemin_csv, min_count=2, genres_a_ignorer=GENRES_A_IGNORER, afficher_erreurs=True,
+                   incremental=False):
+    """Recharge le modèle depuis son artefact s'il est à jour, sinon entraîne et sauvegarde.
+
+    Renvoie (modele, df) ; df vaut None quand le modèle vient de l'artefact.
+    Avec incremental=True, le modèle est mis à jour à partir des seules lignes
+    modifiées depuis l'export précédent (voir accumulateurs.rafraichir_modele).
+    """
+    if incremental:
+        from accumulateurs import rafraichir_modele
+        try:
+            modele, df, _ = rafraichir_modele(chemin_csv, min_count, genres_a_ignorer)
+        except FileNotFoundError:
+            print("Fichier introuvable.")
+            return None, None
+        return modele, df
+
+    chemin = artefact.chemin_artefact(chemin_csv)
+    modele = artefact.charger_modele(chemin, chemin_csv, min_count, genres_a_ignorer)
+    if modele is not None:
+        annoter(source='artefact')
+        return modele, None
+
+    df = charger_et_preparer_donnees(chemin_csv, afficher_erreurs=afficher_erreurs)
+    if df is None:
+        return None, None
+    modele = entrainer_modele(df, min_count, genres_a_ignorer)
+    try:
+        artefact.sauvegarder_modele(modele, chemin, chemin_csv, min_count, genres_a_ignorer)
+    except OSError as e:
+        print(f"Impossible de sauvegarder le modèle : {e}")
+    return modele, df
+
 # ==========================================
 # 3. MOTEUR DE PRÉDICTION
 # ==========================================
 
+@instrumente("prediction")
 def predire_note(model, studio, source, type_anime, rating, genre, saison):
     score = model['base_score']
     details = []
@@ -112,26 +324,170 @@ def predire_note(model, studio, source, type_anime, rating, genre, saison):
     final_score = max(1.0, min(10.0, score))
     return final_score, details
 
+def seuil_top(model, proportion=0.10):
+    """Score minimal du top `proportion` des animes d'entraînement (None sans sketch)."""
+    sketch = model.get('sketch_scores')
+    return None if sketch is None or not len(sketch) else sketch.seuil_top(proportion)
+
+def classer_top_notes(model, notes, proportion=0.10):
+    """Décision top X % d'un lot de notes prédites (tableau booléen), None sans sketch."""
+    seuil = seuil_top(model, proportion)
+    return None if seuil is None else classer_top(notes, seuil)
+
+def premier_genre(genres):
+    """Premier genre exploitable de chaque ligne (le second si le premier est ignoré)."""
+    if isinstance(genres.dtype, pd.CategoricalDtype):
+        # Calcul sur les combinaisons distinctes, puis catégorielle réindexée par code
+        premiers = premier_genre(pd.Series(list(genres.cat.categories) + [np.nan], dtype=object))
+        codes, uniques = pd.factorize(premiers.to_numpy(dtype=object))
+        return pd.Series(pd.Categorical.from_codes(codes[genres.cat.codes.to_numpy()], categories=uniques),
+                         index=genres.index)
+    parties = genres.astype(str).str.split(',')
+    g1 = parties.str[0].str.strip()
+    g2 = parties.str[1].str.strip()
+    return g1.where(~(g1.isin(GENRES_A_IGNORER) & g2.notna()), g2)
+
+def profil_depuis_titre(df, titre):
+    """Profil (studio, source, type, rating, genre, saison) d'un anime existant, ou None."""
+    if 'Name' not in df.columns:
+        return None
+    lignes = df.index[df['Name'].astype(str) == titre]
+    if not len(lignes):
+        return None
+    ligne = df.loc[lignes[:1]]
+    return {
+        'studio': str(ligne['Studios'].iloc[0]),
+        'source': str(ligne['Source'].iloc[0]),
+        'type': str(ligne['Type'].iloc[0]),
+        'rating': str(ligne['Rating'].iloc[0]),
+        'genre': str(premier_genre(ligne['Genres']).iloc[0]),
+        'saison': str(ligne['season_cleaned'].iloc[0]),
+    }
+
+def _ajustements(valeurs, table):
+    # Recherche vectorisée des ajustements d'une colonne (0 si catégorie inconnue)
+    if not isinstance(valeurs, pd.Series):
+        valeurs = pd.Series(valeurs)
+    if isinstance(valeurs.dtype, pd.CategoricalDtype):
+        adj_cats = np.array([table.get(c, 0.0) for c in valeurs.cat.categories], dtype=float)
+        codes = valeurs.cat.codes.to_numpy()
+        return np.where(codes >= 0, adj_cats[codes] if len(adj_cats) else 0.0, 0.0)
+    return valeurs.map(table).fillna(0.0).to_numpy(dtype=float)
+
+@instrumente("prediction_lot")
+def predire_notes_batch(model, studios, sources, types, ratings, genres, saisons, expliquer=False):
+    """Version colonne de predire_note : renvoie un tableau NumPy de notes bornées à [1, 10].
+
+    Avec expliquer=True, renvoie aussi la liste des détails de chaque ligne,
+    au même format que predire_note.
+    """
+    colonnes = [
+        (studios, 'adj_studio', "Studio"),
+        (sources, 'adj_source', "Source"),
+        (types, 'adj_type', "Format"),
+        (ratings, 'adj_rating', "Rating"),
+        (saisons, 'adj_season', "Saison"),
+        (genres, 'adj_genre', "Genre"),
+    ]
+    valeurs_adj = [_ajustements(valeurs, model[cle]) for valeurs, cle, _ in colonnes]
+    annoter(lignes=len(valeurs_adj[0]))
+
+    scores = np.full(len(valeurs_adj[0]), model['base_score'], dtype=float)
+    for adj in valeurs_adj:
+        scores += adj
+    scores = np.clip(scores, 1.0, 10.0)
+    if not expliquer:
+        return scores
+
+    details = []
+    libelles = [(list(valeurs), label) for valeurs, _, label in colonnes]
+    for i in range(len(scores)):
+        lignes = []
+        for (valeurs, label), adj in zip(libelles, valeurs_adj):
+            signe = "+" if adj[i] >= 0 else ""
+            lignes.append(f"{label}: {valeurs[i]} : {signe}{adj[i]:.2f}")
+        details.append(lignes)
+    return scores, details
+
+def frequences_empiriques(df):
+    """Effectifs observés de chaque valeur, par dimension du profil ({dim: {valeur: effectif}})."""
+    frequences = {}
+    for dim, cle, _ in DIMENSIONS:
+        if cle == 'adj_genre':
+            effectifs = paires_genres(df)['genre'].value_counts()
+        else:
+            effectifs = df[COLONNES_AJUSTEMENTS[cle]].value_counts()
+        frequences[dim] = {str(valeur): int(n) for valeur, n in effectifs.items() if n > 0}
+    return frequences
+
 # ==========================================
 # 4. DASHBOARD 
 # ==========================================
 
-def afficher_dashboard(model, df):
+# Au-delà de ce nombre de points, le nuage de précision passe en densité (hexbin)
+SEUIL_DENSITE = 50_000
+
+# Dernier calcul du dashboard, réutilisé tant que le modèle et les données sont les mêmes
+_cache_dashboard = {'model': None, 'df': None, 'intervalles': None, 'donnees': None}
+
+@instrumente("dashboard_calculs")
+def preparer_dashboard(model, df, intervalles=None):
+    """Calculs du dashboard (sans tracé), utilisables hors du thread de l'interface.
+
+    Le résultat est mis en cache : un second appel avec le même modèle, le
+    même DataFrame et les mêmes intervalles bootstrap ne refait aucun calcul.
+    """
+    if (_cache_dashboard['model'] is model and _cache_dashboard['df'] is df
+            and _cache_dashboard['intervalles'] is intervalles):
+        return _cache_dashboard['donnees']
+
     # Calcul des prédictions pour le graphique de précision
-    def predict_row(row):
-        genres_list = row['Genres'].split(',')
-        g = genres_list[0].strip()
-        if (g in ["Award Winning", "UNKNOWN", "nan"]) and len(genres_list) > 1:
-             g = genres_list[1].strip()
-             
-        p, _ = predire_note(model, row['Studios'], row['Source'], row['Type'], 
-                            row['Rating'], g, row['season_cleaned'])
-        return p
+    predictions = predire_notes_batch(model, df['Studios'], df['Source'], df['Type'],
+                                      df['Rating'], premier_genre(df['Genres']), df['season_cleaned'])
+    notes_reelles = df['Score'].to_numpy(dtype=float)
+
+    all_sorted_genres = sorted(model['adj_genre'].items(), key=lambda x: x[1], reverse=True)
+    clean_sorted_genres = [x for x in all_sorted_genres if x[0] not in ["UNKNOWN", "nan"]]
 
-    df_viz = df.copy()
-    df_viz['prediction'] = df_viz.apply(predict_row, axis=1)
+    donnees = {
+        'predictions': predictions,
+        'notes_reelles': notes_reelles,
+        'mae': np.abs(notes_reelles - predictions).mean(),
+        'saisons': {k: v for k, v in model['adj_season'].items() if k != 'Unknown'},
+        'types': {k: v for k, v in model['adj_type'].items() if k != 'UNKNOWN'},
+        'top_genres': dict(clean_sorted_genres[:5]),
+        'pires_genres': dict(clean_sorted_genres[-5:]),
+        'ratings': {k: v for k, v in model['adj_rating'].items() if k != 'UNKNOWN'},
+        'intervalles': intervalles or {},
+    }
+    _cache_dashboard.update(model=model, df=df, intervalles=intervalles, donnees=donnees)
+    return donnees
+
+@instrumente("dashboard_rendu")
+def afficher_dashboard(model, df, donnees=None, fichier=None):
+    """Trace les six panneaux ; avec fichier, les enregistre (PNG, SVG...) au lieu de les afficher."""
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    if donnees is None:
+        donnees = preparer_dashboard(model, df)
+    predictions = donnees['predictions']
+    notes_reelles = donnees['notes_reelles']
+    mae = donnees['mae']
+    intervalles = donnees.get('intervalles') or {}
 
-    mae = (df_viz['Score'] - df_viz['prediction']).abs().mean()
+    def barres_erreur(categories, valeurs, cle, horizontal=False):
+        # Intervalles bootstrap, s'ils ont été calculés (largeur nulle pour une catégorie sans intervalle)
+        bornes = intervalles.get(cle)
+        if not bornes or not categories:
+            return
+        bas = [max(0.0, v - bornes.get(c, (v, v))[0]) for c, v in zip(categories, valeurs)]
+        haut = [max(0.0, bornes.get(c, (v, v))[1] - v) for c, v in zip(categories, valeurs)]
+        positions = range(len(categories))
+        if horizontal:
+            plt.errorbar(valeurs, positions, xerr=[bas, haut], fmt='none', ecolor='black', capsize=3)
+        else:
+            plt.errorbar(positions, valeurs, yerr=[bas, haut], fmt='none', ecolor='black', capsize=3)
 
     plt.style.use('default') 
     plt.figure(figsize=(16, 10)) 
@@ -139,49 +495,56 @@ def afficher_dashboard(model, df):
 
     # 1. Saisons
     plt.subplot(2, 3, 1) 
-    saisons_data = {k: v for k, v in model['adj_season'].items() if k != 'Unknown'}
+    saisons_data = donnees['saisons']
     saisons = list(saisons_data.keys())
     valeurs = list(saisons_data.values())
     if saisons:
         sns.barplot(x=saisons, y=valeurs, hue=saisons, palette="coolwarm", legend=False)
+        barres_erreur(saisons, valeurs, 'adj_season')
     plt.title("Impact de la Saison")
     plt.ylabel("Bonus/Malus")
     plt.axhline(0, color='black', linewidth=0.8)
 
     # 2. Formats
     plt.subplot(2, 3, 2) 
-    types_data = {k: v for k, v in model['adj_type'].items() if k != 'UNKNOWN'}
+    types_data = donnees['types']
     types = list(types_data.keys())
     valeurs_type = list(types_data.values())
     if types:
         sns.barplot(x=types, y=valeurs_type, hue=types, palette="viridis", legend=False)
+        barres_erreur(types, valeurs_type, 'adj_type')
     plt.title("Impact du Format")
     plt.axhline(0, color='black', linewidth=0.8)
 
     # 3. Top Genres
-    all_sorted_genres = sorted(model['adj_genre'].items(), key=lambda x: x[1], reverse=True)
-    clean_sorted_genres = [x for x in all_sorted_genres if x[0] not in ["UNKNOWN", "nan"]]
-    top_genres = dict(clean_sorted_genres[:5])
+    top_genres = donnees['top_genres']
     plt.subplot(2, 3, 3)
     if top_genres:
         sns.barplot(x=list(top_genres.values()), y=list(top_genres.keys()), hue=list(top_genres.keys()), palette="Greens_r", legend=False)
+        barres_erreur(list(top_genres.keys()), list(top_genres.values()), 'adj_genre', horizontal=True)
     plt.title("Top 5 Genres (Bonus)")
 
     # 4. 5 Pires Genres (Filtrés)
-    worst_genres = dict(clean_sorted_genres[-5:])
+    worst_genres = donnees['pires_genres']
     x_vals_worst = list(worst_genres.values())
     y_vals_worst = list(worst_genres.keys())
     
     plt.subplot(2, 3, 4) 
     if worst_genres:
         sns.barplot(x=x_vals_worst, y=y_vals_worst, hue=y_vals_worst, palette="Reds_r", legend=False)
+        barres_erreur(y_vals_worst, x_vals_worst, 'adj_genre', horizontal=True)
     plt.title("5 pires Genres (Malus)")
 
     # 5. Précision
     plt.subplot(2, 3, 5)
-    plt.scatter(df_viz['Score'], df_viz['prediction'], alpha=0.6, color='purple')
-    if not df_viz.empty:
-        min_val = min(df_viz['Score'].min(), df_viz['prediction'].min())
+    if len(predictions) > SEUIL_DENSITE:
+        # Trop de points pour un nuage lisible : densité par cellules hexagonales
+        plt.hexbin(notes_reelles, predictions, gridsize=60, bins='log', mincnt=1, cmap='Purples')
+        plt.colorbar(label="Nombre d'animes (log)")
+    else:
+        plt.scatter(notes_reelles, predictions, alpha=0.6, color='purple')
+    if len(predictions):
+        min_val = min(notes_reelles.min(), predictions.min())
         plt.plot([min_val, 10], [min_val, 10], color='red', linestyle='--', label="Idéal")
     
     plt.title(f"Précision (MAE: {mae:.2f})") 
@@ -191,7 +554,7 @@ def afficher_dashboard(model, df):
 
     # 6. Rating 
     plt.subplot(2, 3, 6)
-    rating_data = {k: v for k, v in model['adj_rating'].items() if k != 'UNKNOWN'}
+    rating_data = donnees['ratings']
     r_keys = list(rating_data.keys())
     r_vals = list(rating_data.values())
     
@@ -199,25 +562,66 @@ def afficher_dashboard(model, df):
     
     if r_keys:
         sns.barplot(x=r_keys, y=r_vals, hue=r_keys, palette="magma", legend=False)
+        barres_erreur(r_keys, r_vals, 'adj_rating')
         plt.xticks(range(len(r_keys)), r_labels_short, rotation=15)
     plt.title("Impact Classification (Rating)")
     plt.axhline(0, color='black', linewidth=0.8)
 
     plt.tight_layout()
-    plt.show()
+    if fichier:
+        plt.savefig(fichier)
+        plt.close()
+    else:
+        plt.show()
+
+def generer_rapport(chemin_csv, fichier, replicats_bootstrap=0, incremental=False):
+    """Rendu du dashboard dans un fichier, sans affichage (serveurs sans écran)."""
+    import matplotlib
+    matplotlib.use('Agg')
+    model, df = obtenir_modele(chemin_csv, afficher_erreurs=False, incremental=incremental)
+    if model is None:
+        raise FileNotFoundError(chemin_csv)
+    if df is None:
+        df = charger_et_preparer_donnees(chemin_csv, afficher_erreurs=False)
+    intervalles = None
+    if replicats_bootstrap:
+        from bootstrap import intervalles_bootstrap
+        intervalles = intervalles_bootstrap(df, replicats_bootstrap)
+    afficher_dashboard(model, df, preparer_dashboard(model, df, intervalles), fichier=fichier)
 
 
 # ==========================================
 # 5. INTERFACE GRAPHIQUE 
 # ==========================================
 
+# Nombre maximal de propositions affichées dans une liste filtrée
+LIMITE_SUGGESTIONS = 200
+# Touches de navigation qui ne doivent pas relancer le filtrage
+TOUCHES_NAVIGATION = {"Up", "Down", "Left", "Right", "Return", "Escape", "Tab", "ISO_Left_Tab"}
+# Contrainte de chaque dimension dans la recherche des meilleurs profils
+MODES_RECHERCHE = ["libre", "fixé (sélection)", "exclu (sélection)"]
+# Loi de tirage des profils de la simulation Monte-Carlo
+MODES_TIRAGE = ["uniforme", "fréquences observées"]
+# Seconde dimension du panneau de sensibilité (grille) : aucune = balayage simple
+SANS_SECONDE_DIMENSION = "aucune"
+# Nombre maximal de lignes affichées dans le classement d'une grille
+LIMITE_GRILLE = 500
+
 class AnimePredictorApp:
-    def __init__(self, root, model, df):
+    def __init__(self, root, model=None, df=None, chemin_csv=None, replicats_bootstrap=0, incremental=False):
+        # Sans modèle fourni, la fenêtre s'affiche tout de suite et le
+        # chargement / l'entraînement tournent dans un thread de travail
+        _charger_tkinter()
         self.model = model
         self.df = df
+        self.chemin_csv = chemin_csv
+        self.incremental = incremental
+        # Avec replicats_bootstrap > 0, les intervalles de confiance sont calculés après le modèle
+        self.replicats_bootstrap = replicats_bootstrap
+        self.intervalles = {}
         self.root = root
         self.root.title("🔮 Anime Predictor")
-        self.root.geometry("650x800") 
+        self.root.geometry("650x950") 
         
         BG_COLOR = "#f5f6fa"       
         FG_COLOR = "#2c3e50"       
@@ -244,20 +648,36 @@ class AnimePredictorApp:
         # --- CONTENU ---
         header = ttk.Label(root, text="ANIME SUCCESS PREDICTOR", style="Header.TLabel")
         header.pack(pady=25)
+        self.header = header
+
+        # Indicateur de progression des tâches de fond
+        self.statut_frame = ttk.Frame(root)
+        self.statut_label = ttk.Label(self.statut_frame, text="")
+        self.statut_label.pack()
+        self.progression = ttk.Progressbar(self.statut_frame, mode="indeterminate")
+        self.progression.pack(fill=tk.X)
 
         main_frame = ttk.Frame(root, padding="20")
         main_frame.pack(fill=tk.BOTH, expand=True)
 
-        self.studios = sorted([k for k, v in model['adj_studio'].items() if v != 0])
-        
-        self.sources = sorted([k for k in model['adj_source'].keys()])
-        self.types = sorted([k for k in model['adj_type'].keys()])
-        self.ratings = sorted([k for k in model['adj_rating'].keys()])
-        self.genres = sorted([k for k in model['adj_genre'].keys()])
+        self.studios, self.sources, self.types, self.ratings, self.genres = [], [], [], [], []
         self.saisons = ["Winter", "Spring", "Summer", "Fall"]
 
         self.vars = {}
-        row = 0
+        self.combos = {}
+        self.index = {}
+        self.index_titres = None
+        self.indexation_en_cours = False
+
+        # Recherche d'un anime existant pour préremplir le profil
+        ttk.Label(main_frame, text="🔎 Titre existant").grid(row=0, column=0, sticky="w", pady=8)
+        self.titre_var = tk.StringVar()
+        self.titre_combo = ttk.Combobox(main_frame, textvariable=self.titre_var, width=32)
+        self.titre_combo.grid(row=0, column=1, sticky="e", pady=8, padx=10)
+        self.titre_combo.bind("<KeyRelease>", self.chercher_titre)
+        self.titre_combo.bind("<<ComboboxSelected>>", self.titre_choisi)
+
+        row = 1
         self.create_dropdown(main_frame, "🎬 Studio d'Animation", self.studios, "studio", row); row+=1
         self.create_dropdown(main_frame, "📖 Source Originale", self.sources, "source", row); row+=1
         self.create_dropdown(main_frame, "📺 Format", self.types, "type", row); row+=1
@@ -275,8 +695,23 @@ class AnimePredictorApp:
         predict_btn = ttk.Button(btn_frame, text="LANCER LA SIMULATION", command=self.lancer_calcul)
         predict_btn.pack(fill=tk.X, pady=(5, 5), padx=40, ipady=5)
 
+        meilleurs_btn = ttk.Button(btn_frame, text="🏆 MEILLEURS PROFILS", command=self.ouvrir_meilleurs)
+        meilleurs_btn.pack(fill=tk.X, pady=5, padx=40)
+
+        simulation_btn = ttk.Button(btn_frame, text="🎰 SIMULATION MONTE-CARLO", command=self.ouvrir_simulation)
+        simulation_btn.pack(fill=tk.X, pady=5, padx=40)
+
+        sensibilite_btn = ttk.Button(btn_frame, text="📈 SENSIBILITÉ DU PROFIL", command=self.ouvrir_sensibilite)
+        sensibilite_btn.pack(fill=tk.X, pady=5, padx=40)
+
         viz_btn = ttk.Button(btn_frame, text="📊 VOIR LES STATISTIQUES", command=self.ouvrir_viz)
         viz_btn.pack(fill=tk.X, pady=5, padx=40)
+        self.boutons = [rand_btn, predict_btn, meilleurs_btn, simulation_btn, sensibilite_btn, viz_btn]
+
+        # Résumé des temps par étape, seulement quand l'instrumentation est active (--profil)
+        if est_actif():
+            profil_btn = ttk.Button(btn_frame, text="⏱️ PROFIL DES ÉTAPES", command=self.ouvrir_profil)
+            profil_btn.pack(fill=tk.X, pady=5, padx=40)
 
         # Zone Résultat
         self.result_frame = ttk.LabelFrame(root, text=" Analyse ", padding="15")
@@ -291,17 +726,173 @@ class AnimePredictorApp:
         self.details_text = tk.Text(self.result_frame, height=8, bg=RESULT_BG, fg="black", relief="flat", font=("Consolas", 10))
         self.details_text.pack(fill=tk.BOTH, expand=True)
 
+        # Résultats des threads de travail, relevés depuis la boucle Tk
+        self.resultats_fond = queue.Queue()
+        # Tâches de fond lancées et pas encore terminées (une seule surveillance de la file)
+        self.taches_en_cours = 0
+        if self.model is None:
+            self.executer_en_fond("Chargement et entraînement du modèle...",
+                                  lambda: obtenir_modele(self.chemin_csv, afficher_erreurs=False,
+                                                         incremental=self.incremental),
+                                  self.modele_pret)
+        else:
+            self.modele_pret((self.model, self.df))
+
+    def executer_en_fond(self, message, tache, rappel):
+        """Lance tache() dans un thread ; rappel(resultat) est ensuite appelé dans le thread Tk."""
+        self.statut_label.config(text=message)
+        self.statut_frame.pack(fill=tk.X, padx=40, after=self.header)
+        self.progression.start(10)
+        for bouton in self.boutons:
+            bouton.state(["disabled"])
+
+        def travail():
+            try:
+                self.resultats_fond.put((rappel, tache(), None))
+            except Exception as e:
+                self.resultats_fond.put((rappel, None, e))
+
+        threading.Thread(target=travail, daemon=True).start()
+        self.taches_en_cours += 1
+        if self.taches_en_cours == 1:
+            self.root.after(50, self.surveiller_fond)
+
+    def surveiller_fond(self):
+        try:
+            rappel, resultat, erreur = self.resultats_fond.get_nowait()
+        except queue.Empty:
+            self.root.after(50, self.surveiller_fond)
+            return
+
+        self.taches_en_cours -= 1
+        if self.taches_en_cours:
+            # D'autres tâches tournent encore : indicateur et boutons restent en l'état
+            self.root.after(50, self.surveiller_fond)
+        else:
+            self.progression.stop()
+            self.statut_frame.pack_forget()
+            if self.model is not None:
+                for bouton in self.boutons:
+                    bouton.state(["!disabled"])
+        if erreur is not None:
+            messagebox.showerror("Erreur", f"Impossible de traiter les données : {erreur}")
+        else:
+            rappel(resultat)
+
+    def modele_pret(self, resultat):
+        model, df = resultat
+        if model is None:
+            messagebox.showerror("Erreur Fatale", "Fichier introuvable.")
+            return
+        self.model = model
+        self.modele_compile = ModeleCompile(model)
+        if df is not None:
+            self.df = df
+
+        self.studios = sorted([k for k, v in model['adj_studio'].items() if v != 0])
+        self.sources = sorted([k for k in model['adj_source'].keys()])
+        self.types = sorted([k for k in model['adj_type'].keys()])
+        self.ratings = sorted([k for k in model['adj_rating'].keys()])
+        self.genres = sorted([k for k in model['adj_genre'].keys()])
+
+        self.remplir_dropdown("studio", self.studios)
+        self.remplir_dropdown("source", self.sources)
+        self.remplir_dropdown("type", self.types)
+        self.remplir_dropdown("genre", self.genres)
+        self.remplir_dropdown("rating", self.ratings)
+        for bouton in self.boutons:
+            bouton.state(["!disabled"])
+        if self.replicats_bootstrap:
+            self.lancer_bootstrap()
+
+    def donnees_chargees(self, df):
+        """DataFrame pour un thread de travail (relu depuis le CSV si le modèle vient de l'artefact)."""
+        if df is None:
+            df = charger_et_preparer_donnees(self.chemin_csv, afficher_erreurs=False)
+            if df is None:
+                raise FileNotFoundError(self.chemin_csv)
+        return df
+
+    def lancer_bootstrap(self):
+        from bootstrap import intervalles_bootstrap
+        model, df, replicats = self.model, self.df, self.replicats_bootstrap
+
+        def calculer():
+            donnees_df = self.donnees_chargees(df)
+            return donnees_df, intervalles_bootstrap(donnees_df, replicats)
+
+        def calcule(resultat):
+            self.df, self.intervalles = resultat
+
+        self.executer_en_fond(f"Intervalles de confiance ({replicats} réplicats bootstrap)...",
+                              calculer, calcule)
+
     def create_dropdown(self, parent, label_text, values, var_name, row):
-        values_epurees = [v for v in values if v not in ["Unknown", "UNKNOWN", "nan"]]
         ttk.Label(parent, text=label_text).grid(row=row, column=0, sticky="w", pady=8)
         var = tk.StringVar()
 
-        combo = ttk.Combobox(parent, textvariable=var, values=values_epurees, state="readonly", width=32)
+        # Liste modifiable : la saisie filtre les propositions via l'index
+        combo = ttk.Combobox(parent, textvariable=var, width=32)
         combo.grid(row=row, column=1, sticky="e", pady=8, padx=10)
-        
+        combo.bind("<KeyRelease>", lambda event: self.filtrer_dropdown(var_name, event))
+
+        self.vars[var_name] = var
+        self.combos[var_name] = combo
+        self.remplir_dropdown(var_name, values)
+
+    def remplir_dropdown(self, var_name, values):
+        values_epurees = [v for v in values if v not in ["Unknown", "UNKNOWN", "nan"]]
+        self.index[var_name] = IndexRecherche(values_epurees)
+        combo = self.combos[var_name]
+        combo.config(values=values_epurees[:LIMITE_SUGGESTIONS])
         if values_epurees:
             combo.current(0)
-        self.vars[var_name] = var
+
+    def filtrer_dropdown(self, var_name, event=None):
+        if event is not None and event.keysym in TOUCHES_NAVIGATION:
+            return
+        self.combos[var_name].config(values=self.index[var_name].chercher(self.vars[var_name].get(),
+                                                                          LIMITE_SUGGESTIONS))
+
+    def chercher_titre(self, event=None):
+        if event is not None and event.keysym in TOUCHES_NAVIGATION:
+            return
+        if self.index_titres is not None:
+            self.titre_combo.config(values=self.index_titres.chercher(self.titre_var.get(), LIMITE_SUGGESTIONS))
+            return
+        # Une seule indexation à la fois, et pas pendant une autre tâche de fond
+        if self.model is None or self.indexation_en_cours or self.boutons[0].instate(["disabled"]):
+            return
+
+        # Premier usage : les titres (et le DataFrame si le modèle vient de
+        # l'artefact) sont chargés et indexés hors du thread Tk
+        df = self.df
+        self.indexation_en_cours = True
+
+        def indexer():
+            try:
+                donnees_df = self.donnees_chargees(df)
+                titres = donnees_df['Name'].dropna().astype(str) if 'Name' in donnees_df.columns else []
+                return donnees_df, IndexRecherche(titres)
+            except Exception:
+                # En cas d'échec, la prochaine frappe pourra relancer l'indexation
+                self.indexation_en_cours = False
+                raise
+
+        def indexe(resultat):
+            self.df, self.index_titres = resultat
+            self.indexation_en_cours = False
+            self.chercher_titre()
+
+        self.executer_en_fond("Indexation des titres...", indexer, indexe)
+
+    def titre_choisi(self, event=None):
+        profil = profil_depuis_titre(self.df, self.titre_var.get()) if self.df is not None else None
+        if profil is None:
+            return
+        for var_name, valeur in profil.items():
+            self.vars[var_name].set(valeur)
+        self.lancer_calcul()
 
     def lancer_calcul(self):
         inputs = {k: v.get() for k, v in self.vars.items()}
@@ -313,9 +904,18 @@ class AnimePredictorApp:
         
         self.details_text.delete(1.0, tk.END)
         self.details_text.insert(tk.END, f"BASE SCORE : {self.model['base_score']:.2f}\n" + "─"*30 + "\n")
-        for line in details:
+        # Même ordre que les lignes de predire_note ; intervalle bootstrap s'il a été calculé
+        for (dim, cle, _), line in zip(DIMENSIONS, details):
+            bornes = self.intervalles.get(cle, {}).get(inputs[dim])
+            if bornes is not None:
+                line += f"  [IC95 {bornes[0]:+.2f} ; {bornes[1]:+.2f}]"
             self.details_text.insert(tk.END, f" {line}\n")
 
+        seuil = seuil_top(self.model)
+        if seuil is not None:
+            decision = "OUI" if note >= seuil else "NON"
+            self.details_text.insert(tk.END, "─"*30 + f"\n TOP 10 % : {decision} (seuil {seuil:.2f})\n")
+
     def generer_aleatoire(self):
         if self.studios: self.vars['studio'].set(random.choice(self.studios))
         if self.sources: self.vars['source'].set(random.choice(self.sources))
@@ -327,18 +927,305 @@ class AnimePredictorApp:
 
         self.lancer_calcul()
 
+    def ouvrir_meilleurs(self):
+        """Fenêtre de recherche des K meilleurs (ou pires) profils sous contraintes."""
+        fenetre = tk.Toplevel(self.root)
+        fenetre.title("🏆 Meilleurs profils")
+        fenetre.geometry("900x500")
+
+        options = ttk.Frame(fenetre, padding="10")
+        options.pack(fill=tk.X)
+        modes = {}
+        for row, (dim, _, libelle) in enumerate(DIMENSIONS):
+            ttk.Label(options, text=libelle).grid(row=row // 3, column=2 * (row % 3), sticky="w", padx=5)
+            modes[dim] = tk.StringVar(value=MODES_RECHERCHE[0])
+            ttk.Combobox(options, textvariable=modes[dim], values=MODES_RECHERCHE, state="readonly",
+                         width=18).grid(row=row // 3, column=2 * (row % 3) + 1, pady=4, padx=5)
+
+        ttk.Label(options, text="Nombre").grid(row=2, column=0, sticky="w", padx=5)
+        k_var = tk.StringVar(value="20")
+        ttk.Spinbox(options, from_=1, to=1000, textvariable=k_var, width=8).grid(row=2, column=1, sticky="w", padx=5)
+        sens_var = tk.StringVar(value="Meilleurs")
+        ttk.Combobox(options, textvariable=sens_var, values=["Meilleurs", "Pires"], state="readonly",
+                     width=18).grid(row=2, column=3, pady=4, padx=5)
+
+        colonnes = ['score'] + NOMS_DIMENSIONS
+        arbre = ttk.Treeview(fenetre, columns=colonnes, show="headings")
+        for col in colonnes:
+            arbre.heading(col, text=col.capitalize())
+            arbre.column(col, width=70 if col == 'score' else 130)
+        arbre.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        resultats = []
+
+        def chercher():
+            contraintes, exclusions = {}, {}
+            for dim, mode in modes.items():
+                valeur = self.vars[dim].get()
+                if mode.get() == MODES_RECHERCHE[1]:
+                    contraintes[dim] = valeur
+                elif mode.get() == MODES_RECHERCHE[2]:
+                    exclusions[dim] = valeur
+            try:
+                k = max(1, int(k_var.get()))
+            except ValueError:
+                k = 20
+            resultats[:] = meilleurs_profils(self.modele_compile, k, contraintes, exclusions,
+                                             pires=sens_var.get() == "Pires")
+            arbre.delete(*arbre.get_children())
+            for i, r in enumerate(resultats):
+                arbre.insert("", tk.END, iid=str(i),
+                             values=[f"{r['score']:.2f}"] + [r['profil'][dim] for dim in NOMS_DIMENSIONS])
+
+        def appliquer(event=None):
+            # Double-clic : le profil est reporté dans la fenêtre principale
+            selection = arbre.selection()
+            if not selection:
+                return
+            for dim, valeur in resultats[int(selection[0])]['profil'].items():
+                if valeur:
+                    self.vars[dim].set(valeur)
+            self.lancer_calcul()
+
+        ttk.Button(options, text="CHERCHER", command=chercher).grid(row=2, column=5, sticky="e", padx=5)
+        arbre.bind("<Double-1>", appliquer)
+        chercher()
+
+    def ouvrir_simulation(self):
+        """Fenêtre de simulation : distribution des notes de profils tirés au hasard."""
+        fenetre = tk.Toplevel(self.root)
+        fenetre.title("🎰 Simulation Monte-Carlo")
+        fenetre.geometry("900x600")
+
+        options = ttk.Frame(fenetre, padding="10")
+        options.pack(fill=tk.X)
+        ttk.Label(options, text="Profils").grid(row=0, column=0, sticky="w", padx=5)
+        nombre_var = tk.StringVar(value="1000000")
+        ttk.Spinbox(options, from_=1000, to=10_000_000, increment=100_000, textvariable=nombre_var,
+                    width=12).grid(row=0, column=1, sticky="w", padx=5)
+        ttk.Label(options, text="Tirage").grid(row=0, column=2, sticky="w", padx=5)
+        tirage_var = tk.StringVar(value=MODES_TIRAGE[0])
+        ttk.Combobox(options, textvariable=tirage_var, values=MODES_TIRAGE, state="readonly",
+                     width=20).grid(row=0, column=3, pady=4, padx=5)
+
+        texte = tk.Text(fenetre, height=12, font=("Consolas", 10))
+        texte.pack(fill=tk.X, padx=10, pady=(0, 5))
+        colonnes = ['effectif', 'score'] + NOMS_DIMENSIONS
+        arbre = ttk.Treeview(fenetre, columns=colonnes, show="headings")
+        for col in colonnes:
+            arbre.heading(col, text=col.capitalize())
+            arbre.column(col, width=70 if col in ('effectif', 'score') else 120)
+        arbre.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        simulation = {}
+
+        def note_courante():
+            inputs = {k: v.get() for k, v in self.vars.items()}
+            return predire_note(self.model, inputs['studio'], inputs['source'], inputs['type'],
+                                inputs['rating'], inputs['genre'], inputs['saison'])[0]
+
+        def afficher(resultat):
+            self.df, resultats = resultat
+            simulation.clear()
+            simulation.update(resultats)
+            note = note_courante()
+            texte.delete(1.0, tk.END)
+            texte.insert(tk.END, f"{len(resultats['scores']):,} profils simulés ({tirage_var.get()})\n"
+                                 + "─"*40 + "\n")
+            for p, valeur in resultats['percentiles'].items():
+                texte.insert(tk.END, f" Percentile {p:>2} : {valeur:.2f}\n")
+            texte.insert(tk.END, "─"*40 + f"\n Profil courant : {note:.2f}, au-dessus de "
+                                 f"{100 * rang_dans_simulation(resultats, note):.1f} % des profils simulés\n")
+            texte.insert(tk.END, f" Combinaisons les plus fréquentes du top 1 % (note ≥ {resultats['seuil_top']:.2f}) :\n")
+            arbre.delete(*arbre.get_children())
+            for i, c in enumerate(resultats['combinaisons']):
+                arbre.insert("", tk.END, iid=str(i), values=[c['effectif'], f"{c['score']:.2f}"]
+                             + [c['profil'][dim] for dim in NOMS_DIMENSIONS])
+
+        def simuler():
+            try:
+                nombre = max(1, int(nombre_var.get()))
+            except ValueError:
+                nombre = 1_000_000
+            modele, df = self.modele_compile, self.df
+            ponderee = tirage_var.get() == MODES_TIRAGE[1]
+
+            def calculer():
+                # Les fréquences observées demandent les données (le modèle peut venir de l'artefact)
+                if not ponderee:
+                    return df, simuler_profils(modele, nombre)
+                donnees_df = self.donnees_chargees(df)
+                return donnees_df, simuler_profils(modele, nombre, frequences_empiriques(donnees_df))
+
+            self.executer_en_fond(f"Simulation de {nombre:,} profils...", calculer, afficher)
+
+        def histogramme():
+            if not simulation:
+                return
+            import matplotlib.pyplot as plt
+            effectifs, bornes = simulation['histogramme']
+            plt.figure(figsize=(9, 5))
+            plt.bar(bornes[:-1], effectifs, width=np.diff(bornes), align='edge', color='#2980b9')
+            plt.axvline(note_courante(), color='#c0392b', linestyle='--', label="Profil courant")
+            plt.axvline(simulation['seuil_top'], color='#27ae60', linestyle=':', label="Seuil du top 1 %")
+            plt.title("Distribution des notes des profils simulés")
+            plt.xlabel("Note prédite")
+            plt.ylabel("Profils")
+            plt.legend()
+            plt.show()
+
+        def appliquer(event=None):
+            # Double-clic : la combinaison est reportée dans la fenêtre principale
+            selection = arbre.selection()
+            if not selection:
+                return
+            for dim, valeur in simulation['combinaisons'][int(selection[0])]['profil'].items():
+                if valeur:
+                    self.vars[dim].set(valeur)
+            self.lancer_calcul()
+
+        ttk.Button(options, text="SIMULER", command=simuler).grid(row=0, column=4, padx=5)
+        ttk.Button(options, text="HISTOGRAMME", command=histogramme).grid(row=0, column=5, padx=5)
+        arbre.bind("<Double-1>", appliquer)
+        simuler()
+
+    def ouvrir_sensibilite(self):
+        """Fenêtre « et si... ? » : note du profil courant pour chaque valeur d'une ou deux dimensions."""
+        fenetre = tk.Toplevel(self.root)
+        fenetre.title("📈 Sensibilité du profil")
+        fenetre.geometry("700x600")
+
+        options = ttk.Frame(fenetre, padding="10")
+        options.pack(fill=tk.X)
+        ttk.Label(options, text="Dimension").grid(row=0, column=0, sticky="w", padx=5)
+        dim_var = tk.StringVar(value=NOMS_DIMENSIONS[0])
+        ttk.Combobox(options, textvariable=dim_var, values=NOMS_DIMENSIONS, state="readonly",
+                     width=12).grid(row=0, column=1, pady=4, padx=5)
+        ttk.Label(options, text="Croisée avec").grid(row=0, column=2, sticky="w", padx=5)
+        seconde_var = tk.StringVar(value=SANS_SECONDE_DIMENSION)
+        ttk.Combobox(options, textvariable=seconde_var, values=[SANS_SECONDE_DIMENSION] + NOMS_DIMENSIONS,
+                     state="readonly", width=12).grid(row=0, column=3, pady=4, padx=5)
+
+        resume = ttk.Label(fenetre, text="")
+        resume.pack(fill=tk.X, padx=10)
+        colonnes = ['rang', 'score', 'écart', 'valeur']
+        arbre = ttk.Treeview(fenetre, columns=colonnes, show="headings")
+        for col in colonnes:
+            arbre.heading(col, text=col.capitalize())
+            arbre.column(col, width=300 if col == 'valeur' else 70)
+        arbre.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        lignes = []
+
+        def balayer(event=None):
+            inputs = {k: v.get() for k, v in self.vars.items()}
+            note = predire_note(self.model, inputs['studio'], inputs['source'], inputs['type'],
+                                inputs['rating'], inputs['genre'], inputs['saison'])[0]
+            dim, seconde = dim_var.get(), seconde_var.get()
+
+            if seconde in (SANS_SECONDE_DIMENSION, dim):
+                valeurs, notes = balayage(self.modele_compile, inputs, dim)
+                lignes[:] = [{dim: v} for v in valeurs]
+                libelles = list(valeurs)
+                resume.config(text=f"Profil courant : {note:.2f} — {len(valeurs)} valeurs de {dim}")
+            else:
+                valeurs_l, valeurs_c, grille_notes = grille(self.modele_compile, inputs, dim, seconde)
+                # Classement des meilleures cases, la grille complète part dans la heatmap
+                meilleures = np.argsort(-grille_notes, axis=None, kind='stable')[:LIMITE_GRILLE]
+                i, j = np.unravel_index(meilleures, grille_notes.shape)
+                notes = grille_notes[i, j]
+                lignes[:] = [{dim: valeurs_l[a], seconde: valeurs_c[b]} for a, b in zip(i, j)]
+                libelles = [f"{valeurs_l[a]} × {valeurs_c[b]}" for a, b in zip(i, j)]
+                resume.config(text=f"Profil courant : {note:.2f} — grille {len(valeurs_l)} {dim} "
+                                   f"× {len(valeurs_c)} {seconde}")
+                afficher_grille(valeurs_l, valeurs_c, grille_notes, dim, seconde, note)
+
+            arbre.delete(*arbre.get_children())
+            for rang, (libelle, n) in enumerate(zip(libelles, notes)):
+                arbre.insert("", tk.END, iid=str(rang),
+                             values=[rang + 1, f"{n:.2f}", f"{n - note:+.2f}", libelle])
+
+        def afficher_grille(valeurs_l, valeurs_c, notes, dim, seconde, note):
+            import matplotlib.pyplot as plt
+            # Lignes et colonnes triées par note moyenne : les meilleures zones se regroupent
+            ordre_l = np.argsort(-notes.mean(axis=1), kind='stable')
+            ordre_c = np.argsort(-notes.mean(axis=0), kind='stable')
+            notes = notes[ordre_l][:, ordre_c]
+            plt.figure(figsize=(10, 8))
+            image = plt.imshow(notes, aspect='auto', cmap='RdYlGn', interpolation='nearest')
+            plt.colorbar(image, label=f"Note prédite (profil courant : {note:.2f})")
+            plt.xticks(range(len(ordre_c)), [valeurs_c[j] for j in ordre_c], rotation=90, fontsize=7)
+            # Au-delà de quelques dizaines de lignes, les libellés deviennent illisibles
+            if len(ordre_l) <= 60:
+                plt.yticks(range(len(ordre_l)), [valeurs_l[i] for i in ordre_l], fontsize=7)
+            plt.xlabel(seconde)
+            plt.ylabel(dim)
+            plt.title(f"Sensibilité : {dim} × {seconde}")
+            plt.tight_layout()
+            plt.show()
+
+        def appliquer(event=None):
+            # Double-clic : la valeur (ou le couple) est reportée dans la fenêtre principale
+            selection = arbre.selection()
+            if not selection:
+                return
+            for dim, valeur in lignes[int(selection[0])].items():
+                if valeur:
+                    self.vars[dim].set(valeur)
+            self.lancer_calcul()
+
+        ttk.Button(options, text="BALAYER", command=balayer).grid(row=0, column=4, padx=5)
+        arbre.bind("<Double-1>", appliquer)
+        balayer()
+
+    def ouvrir_profil(self):
+        fenetre = tk.Toplevel(self.root)
+        fenetre.title("⏱️ Profil des étapes")
+        texte = tk.Text(fenetre, width=72, height=16, font=("Consolas", 10))
+        texte.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        texte.insert(tk.END, resume_texte())
+        texte.config(state="disabled")
+
     def ouvrir_viz(self):
-        afficher_dashboard(self.model, self.df)
+        # Lecture des données (le modèle peut venir de l'artefact) et calculs
+        # du dashboard hors du thread Tk ; seul le tracé reste dans l'interface
+        model, df, intervalles = self.model, self.df, self.intervalles
+
+        def preparer():
+            donnees_df = self.donnees_chargees(df)
+            return donnees_df, preparer_dashboard(model, donnees_df, intervalles)
+
+        def afficher(resultat):
+            self.df, donnees = resultat
+            afficher_dashboard(model, self.df, donnees)
+
+        self.executer_en_fond("Préparation des statistiques...", preparer, afficher)
 
 # ==========================================
 # 6. EXÉCUTION
 # ==========================================
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Anime Success Predictor")
     # Assurez-vous d'avoir le bon nom de fichier CSV
-    df = charger_et_preparer_donnees('anime-dataset-2023.csv') 
-    
-    if df is not None:
-        modele = entrainer_modele(df)
+    parser.add_argument('--csv', default='anime-dataset-2023.csv')
+    parser.add_argument('--rapport', help="Enregistre le dashboard dans ce fichier (.png, .svg) sans ouvrir de fenêtre")
+    parser.add_argument('--bootstrap', type=int, default=0, metavar="REPLICATS",
+                        help="Calcule des intervalles de confiance bootstrap des ajustements")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Ne retraite que les lignes ajoutées, modifiées ou supprimées depuis l'export précédent")
+    parser.add_argument('--profil', metavar="JOURNAL", help="Chronomètre les étapes (journal JSON lines)")
+    parser.add_argument('--profil-memoire', action='store_true', help="Ajoute le pic mémoire (tracemalloc) au profil")
+    args = parser.parse_args()
+
+    if args.profil:
+        import instrumentation
+        instrumentation.activer(args.profil, memoire=args.profil_memoire)
+
+    if args.rapport:
+        generer_rapport(args.csv, args.rapport, args.bootstrap, args.incremental)
+        if est_actif():
+            print(resume_texte())
+    else:
+        # La fenêtre s'ouvre immédiatement ; le modèle est chargé en arrière-plan
+        _charger_tkinter()
         root = tk.Tk()
-        app = AnimePredictorApp(root, modele, df)
+        app = AnimePredictorApp(root, chemin_csv=args.csv, replicats_bootstrap=args.bootstrap,
+                                incremental=args.incremental)
         root.mainloop()
\ No newline at end of file
@@ -0,0 +1,82 @@
+import argparse
+
+import numpy as np
+
+from meilleurs_profils import options_dimension
+from modele_compile import NOMS_DIMENSIONS
+
+# ==========================================
+# SENSIBILITÉ D'UN PROFIL (ET SI... ?)
+# ==========================================
+# La note est base + somme des ajustements, bornée à [1, 10]. Pour balayer
+# toutes les valeurs d'une dimension, on fixe la somme des autres
+# contributions et on lui ajoute le tableau d'ajustements de la dimension
+# (une seule addition vectorielle) ; une grille de deux dimensions est un
+# produit externe par diffusion (broadcast) des deux tableaux.
+
+
+def contributions_profil(modele, profil):
+    """Ajustement de chaque dimension du profil ({dim: valeur}), 0 pour une valeur inconnue."""
+    return {dim: float(modele.ajustements[dim][modele.codes(dim, [profil.get(dim, "")])[0]])
+            for dim in NOMS_DIMENSIONS}
+
+
+def _base_sans(modele, profil, dims):
+    # Note du profil privée des dimensions balayées
+    contributions = contributions_profil(modele, profil)
+    return modele.base_score + sum(v for dim, v in contributions.items() if dim not in dims)
+
+
+def balayage(modele, profil, dim):
+    """Notes du profil pour chaque valeur de `dim`, de la meilleure à la moins bonne.
+
+    Renvoie (valeurs, notes) ; les autres dimensions gardent la valeur du profil.
+    """
+    valeurs, ajustements = options_dimension(modele, dim)
+    notes = np.clip(_base_sans(modele, profil, {dim}) + ajustements, 1.0, 10.0)
+    ordre = np.argsort(-notes, kind='stable')
+    return [valeurs[i] for i in ordre], notes[ordre]
+
+
+def grille(modele, profil, dim_lignes, dim_colonnes):
+    """Notes du profil pour chaque couple de valeurs de deux dimensions.
+
+    Renvoie (valeurs_lignes, valeurs_colonnes, notes) avec notes[i, j] pour
+    la i-ème valeur de dim_lignes et la j-ème de dim_colonnes.
+    """
+    if dim_lignes == dim_colonnes:
+        raise ValueError("Les deux dimensions de la grille doivent être différentes.")
+    lignes, adj_lignes = options_dimension(modele, dim_lignes)
+    colonnes, adj_colonnes = options_dimension(modele, dim_colonnes)
+    base = _base_sans(modele, profil, {dim_lignes, dim_colonnes})
+    notes = np.clip(base + adj_lignes[:, None] + adj_colonnes[None, :], 1.0, 10.0)
+    return lignes, colonnes, notes
+
+
+if __name__ == "__main__":
+    from script import obtenir_modele
+    from modele_compile import ModeleCompile
+
+    parser = argparse.ArgumentParser(description="Sensibilité de la note d'un profil à une ou deux dimensions")
+    parser.add_argument('dimensions', nargs='+', choices=NOMS_DIMENSIONS, help="Une ou deux dimensions à balayer")
+    parser.add_argument('--csv', default='anime-dataset-2023.csv')
+    parser.add_argument('--nombre', type=int, default=20, help="Résultats affichés")
+    for dim in NOMS_DIMENSIONS:
+        parser.add_argument(f'--{dim}', default="", help=f"Valeur de {dim} du profil")
+    args = parser.parse_args()
+
+    modele, _ = obtenir_modele(args.csv, afficher_erreurs=False)
+    if modele is None:
+        raise SystemExit("Fichier introuvable.")
+    modele = ModeleCompile(modele)
+    profil = {dim: getattr(args, dim) for dim in NOMS_DIMENSIONS}
+
+    if len(args.dimensions) == 1:
+        valeurs, notes = balayage(modele, profil, args.dimensions[0])
+        for valeur, note in list(zip(valeurs, notes))[:args.nombre]:
+            print(f"{note:.2f} | {valeur}")
+    else:
+        lignes, colonnes, notes = grille(modele, profil, *args.dimensions[:2])
+        meilleures = np.argsort(-notes, axis=None, kind='stable')[:args.nombre]
+        for i, j in zip(*np.unravel_index(meilleures, notes.shape)):
+            print(f"{notes[i, j]:.2f} | {lignes[i]} x {colonnes[j]}")
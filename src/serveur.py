@@ -0,0 +1,194 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from modele_compile import NOMS_DIMENSIONS, ModeleCompile
+
+# ====================================================================
+# SERVICE DE PRÉDICTION HTTP (SANS INTERFACE GRAPHIQUE)
+# ====================================================================
+# Le modèle est chargé (ou entraîné) une seule fois au démarrage puis compilé ;
+# chaque requête ne fait que des recherches de codes et des additions NumPy.
+#
+#   GET  /sante          -> {"statut": "ok"}
+#   POST /predire        {"studio": ..., "source": ..., "type": ..., "rating": ...,
+#                         "genre": ..., "saison": ..., "contributions": false}
+#   POST /predire/lot    {"profils": [{...}, ...], "contributions": false}
+
+TAILLE_MAX_CORPS = 64 * 1024 * 1024
+# Au-delà de cette taille de corps, décodage JSON, notation et encodage de la
+# réponse se font dans un processus worker qui garde sa propre copie du modèle
+# compilé : la boucle d'événements ne fait que lire et écrire des octets (/sante
+# et les petites requêtes restent servies), et plusieurs gros lots sont notés
+# en parallèle, chacun avec son GIL.
+SEUIL_CORPS_WORKER = 256 * 1024
+
+_MODELE = {}
+
+
+class ErreurRequete(Exception):
+    def __init__(self, statut, message):
+        super().__init__(message)
+        self.statut = statut
+
+
+def _profils_en_colonnes(profils):
+    try:
+        return {dim: [str(p.get(dim, "")) for p in profils] for dim in NOMS_DIMENSIONS}
+    except AttributeError:
+        raise ErreurRequete(400, "Chaque profil doit être un objet JSON.")
+
+
+def noter(modele, profils, avec_contributions):
+    """Réponse JSON d'un lot de profils (liste de dictionnaires)."""
+    colonnes = _profils_en_colonnes(profils)
+    if avec_contributions:
+        scores, contributions = modele.predire(colonnes, avec_contributions=True)
+        details = [{dim: float(contributions[dim][i]) for dim in NOMS_DIMENSIONS} for i in range(len(scores))]
+        return {'scores': scores.tolist(), 'contributions': details}
+    return {'scores': modele.predire(colonnes).tolist()}
+
+
+def _encoder(reponse):
+    return json.dumps(reponse).encode('utf-8')
+
+
+def _traiter_json(modele, chemin, corps):
+    try:
+        donnees = json.loads(corps or b"{}")
+    except ValueError:
+        raise ErreurRequete(400, "Corps JSON invalide.")
+    if not isinstance(donnees, dict):
+        raise ErreurRequete(400, "Le corps doit être un objet JSON.")
+    avec_contributions = bool(donnees.get('contributions', False))
+
+    if chemin == '/predire':
+        reponse = noter(modele, [donnees], avec_contributions)
+        resultat = {'score': reponse['scores'][0]}
+        if avec_contributions:
+            resultat['contributions'] = reponse['contributions'][0]
+        return resultat
+
+    profils = donnees.get('profils')
+    if not isinstance(profils, list):
+        raise ErreurRequete(400, "Le champ 'profils' doit être une liste.")
+    return noter(modele, profils, avec_contributions)
+
+
+def repondre_requete(modele, chemin, corps):
+    """(statut, corps JSON encodé) d'un POST sur /predire ou /predire/lot."""
+    try:
+        return 200, _encoder(_traiter_json(modele, chemin, corps))
+    except ErreurRequete as e:
+        return e.statut, _encoder({'erreur': str(e)})
+
+
+def _initialiser_worker(modele):
+    _MODELE['compile'] = modele
+
+
+def _repondre_worker(chemin, corps):
+    return repondre_requete(_MODELE['compile'], chemin, corps)
+
+
+class ServeurPrediction:
+    def __init__(self, modele, workers=4):
+        self.modele = modele
+        # Workers lancés par spawn : créés à la demande, des processus issus de fork
+        # hériteraient des sockets clients ouverts et les garderaient ouverts
+        self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_initialiser_worker, initargs=(modele,),
+                                        mp_context=multiprocessing.get_context('spawn'))
+
+    async def traiter(self, methode, chemin, corps):
+        if methode == 'GET' and chemin == '/sante':
+            return 200, _encoder({'statut': 'ok'})
+        if methode != 'POST' or chemin not in ('/predire', '/predire/lot'):
+            return 404, _encoder({'erreur': "Route inconnue."})
+        if len(corps) < SEUIL_CORPS_WORKER:
+            return repondre_requete(self.modele, chemin, corps)
+        boucle = asyncio.get_running_loop()
+        return await boucle.run_in_executor(self.pool, _repondre_worker, chemin, corps)
+
+    async def connexion(self, lecteur, ecrivain):
+        try:
+            while True:
+                try:
+                    entete = await lecteur.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                lignes = entete.decode('latin-1').split("\r\n")
+                try:
+                    methode, chemin, version = lignes[0].split(" ", 2)
+                except ValueError:
+                    break
+                entetes = {}
+                for ligne in lignes[1:]:
+                    if ":" in ligne:
+                        nom, valeur = ligne.split(":", 1)
+                        entetes[nom.strip().lower()] = valeur.strip()
+
+                # Entier décimal positif uniquement (ni signe, ni virgule)
+                valeur = entetes.get('content-length', '0') or '0'
+                if not (valeur.isascii() and valeur.isdigit()):
+                    await self.repondre(ecrivain, 400, _encoder({'erreur': "Content-Length invalide."}), False)
+                    break
+                longueur = int(valeur)
+                if longueur > TAILLE_MAX_CORPS:
+                    await self.repondre(ecrivain, 413, _encoder({'erreur': "Corps trop volumineux."}), False)
+                    break
+                try:
+                    corps = await lecteur.readexactly(longueur) if longueur else b""
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    # Client parti avant la fin du corps annoncé
+                    break
+
+                garder = entetes.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+                statut, reponse = await self.traiter(methode, chemin, corps)
+                await self.repondre(ecrivain, statut, reponse, garder)
+                if not garder:
+                    break
+        finally:
+            ecrivain.close()
+
+    async def repondre(self, ecrivain, statut, corps, garder):
+        # corps : réponse JSON déjà encodée (par la boucle ou par un worker)
+        raisons = {200: "OK", 400: "Bad Request", 404: "Not Found", 413: "Payload Too Large"}
+        entete = (f"HTTP/1.1 {statut} {raisons.get(statut, '')}\r\n"
+                  f"Content-Type: application/json\r\n"
+                  f"Content-Length: {len(corps)}\r\n"
+                  f"Connection: {'keep-alive' if garder else 'close'}\r\n\r\n")
+        ecrivain.write(entete.encode('latin-1') + corps)
+        await ecrivain.drain()
+
+
+async def servir(modele, hote="127.0.0.1", port=8000, workers=4):
+    serveur_prediction = ServeurPrediction(ModeleCompile(modele), workers)
+    serveur = await asyncio.start_server(serveur_prediction.connexion, hote, port)
+    print(f"Service de prédiction sur http://{hote}:{port} ({workers} workers)")
+    try:
+        async with serveur:
+            await serveur.serve_forever()
+    finally:
+        serveur_prediction.pool.shutdown(cancel_futures=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Service HTTP de prédiction du score d'un anime")
+    parser.add_argument('--csv', default='anime-dataset-2023.csv')
+    parser.add_argument('--hote', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=4,
+                        help="Processus notant les gros lots (chacun avec une copie du modèle compilé)")
+    args = parser.parse_args()
+
+    # Chargement (ou entraînement) unique du modèle au démarrage
+    from script import obtenir_modele
+    modele, _ = obtenir_modele(args.csv)
+    if modele is None:
+        raise SystemExit("Impossible de charger le modèle.")
+    try:
+        asyncio.run(servir(modele, args.hote, args.port, args.workers))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,107 @@
+import numpy as np
+
+from meilleurs_profils import VALEURS_IGNOREES
+from modele_compile import NOMS_DIMENSIONS
+
+# ==========================================
+# SIMULATION MONTE-CARLO DE PROFILS
+# ==========================================
+# Des millions de profils sont tirés d'un coup, dimension par dimension, sous
+# forme de codes entiers (uniformément ou selon les effectifs observés) ; leurs
+# notes s'obtiennent par recherches dans les tableaux d'ajustements du
+# ModeleCompile. On en déduit la distribution des notes, ses percentiles et
+# les combinaisons les plus fréquentes parmi les profils les mieux notés.
+
+PERCENTILES = [1, 5, 10, 25, 50, 75, 90, 95, 99]
+NB_CLASSES = 60
+
+
+def probabilites_dimension(modele, dim, frequences=None):
+    """Codes tirables d'une dimension et leurs probabilités.
+
+    frequences : {valeur: effectif} ; None, ou aucune valeur connue du
+    modèle, donne un tirage uniforme. Une dimension sans catégorie (la source
+    pour l'OLS) ne propose que le code inconnu, d'ajustement nul.
+    """
+    codes = [i for i, v in enumerate(modele.categories[dim]) if v not in VALEURS_IGNOREES]
+    if not codes:
+        return np.array([modele.code_inconnu(dim)]), np.ones(1)
+    poids = np.ones(len(codes))
+    if frequences:
+        observes = np.array([frequences.get(modele.categories[dim][i], 0) for i in codes], dtype=np.float64)
+        if observes.sum() > 0:
+            poids = observes
+    return np.array(codes), poids / poids.sum()
+
+
+def tirer_codes(modele, nombre, frequences=None, graine=None):
+    """Codes de `nombre` profils tirés au hasard ({dim: tableau d'entiers})."""
+    rng = np.random.default_rng(graine)
+    frequences = frequences or {}
+    tirages = {}
+    for dim in NOMS_DIMENSIONS:
+        codes, probas = probabilites_dimension(modele, dim, frequences.get(dim))
+        if frequences.get(dim):
+            # Tirage pondéré : recherche dans la fonction de répartition
+            positions = np.searchsorted(np.cumsum(probas), rng.random(nombre), side='right')
+            positions = np.minimum(positions, len(codes) - 1)
+        else:
+            positions = rng.integers(0, len(codes), size=nombre)
+        tirages[dim] = codes.astype(np.int32)[positions]
+    return tirages
+
+
+def combinaisons_frequentes(modele, codes, selection, nombre=10):
+    """Combinaisons les plus fréquentes parmi les profils sélectionnés (masque booléen)."""
+    # Chaque profil devient un entier (base mixte sur les tailles des dimensions)
+    tailles = [modele.code_inconnu(dim) + 1 for dim in NOMS_DIMENSIONS]
+    if np.prod(tailles, dtype=np.float64) < 2 ** 62:
+        cles = np.zeros(int(selection.sum()), dtype=np.int64)
+        for dim, taille in zip(NOMS_DIMENSIONS, tailles):
+            cles = cles * taille + codes[dim][selection]
+        uniques, effectifs = np.unique(cles, return_counts=True)
+        lignes = np.empty((len(uniques), len(tailles)), dtype=np.int64)
+        for d in range(len(tailles) - 1, -1, -1):
+            uniques, lignes[:, d] = np.divmod(uniques, tailles[d])
+    else:
+        lignes, effectifs = np.unique(np.column_stack([codes[dim][selection] for dim in NOMS_DIMENSIONS]),
+                                      axis=0, return_counts=True)
+
+    ordre = np.argsort(-effectifs, kind='stable')[:nombre]
+    resultats = []
+    for i in ordre:
+        profil = {dim: (modele.categories[dim][c] if c < modele.code_inconnu(dim) else "")
+                  for dim, c in zip(NOMS_DIMENSIONS, lignes[i])}
+        score = modele.predire_codes({dim: np.array([c]) for dim, c in zip(NOMS_DIMENSIONS, lignes[i])})[0]
+        resultats.append({'effectif': int(effectifs[i]), 'score': float(score), 'profil': profil})
+    return resultats
+
+
+def simuler_profils(modele, nombre=1_000_000, frequences=None, proportion_top=0.01,
+                    nb_combinaisons=10, graine=None):
+    """Tire `nombre` profils et résume la distribution de leurs notes.
+
+    Renvoie {'scores' (trié), 'percentiles': {p: note}, 'histogramme': (effectifs, bornes),
+    'seuil_top', 'combinaisons': [{'effectif', 'score', 'profil'}]} ; les
+    combinaisons sont celles des profils au-dessus du seuil du top `proportion_top`.
+    """
+    codes = tirer_codes(modele, nombre, frequences, graine)
+    scores = modele.predire_codes(codes)
+
+    seuil = float(np.quantile(scores, 1.0 - proportion_top))
+    combinaisons = combinaisons_frequentes(modele, codes, scores >= seuil, nb_combinaisons)
+    # Le tri sert ensuite à situer n'importe quelle note (rang_dans_simulation)
+    scores.sort()
+    return {
+        'scores': scores,
+        'percentiles': dict(zip(PERCENTILES, np.percentile(scores, PERCENTILES))),
+        'histogramme': np.histogram(scores, bins=NB_CLASSES),
+        'seuil_top': seuil,
+        'combinaisons': combinaisons,
+    }
+
+
+def rang_dans_simulation(simulation, note):
+    """Part des profils simulés dont la note est inférieure ou égale à `note`."""
+    scores = simulation['scores']
+    return float(np.searchsorted(scores, note, side='right') / len(scores)) if len(scores) else float('nan')
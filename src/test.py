@@ -4,10 +4,15 @@
 
 import pandas as pd
 import numpy as np
-import statsmodels.api as sm
-from sklearn.preprocessing import MultiLabelBinarizer
 import warnings
 
+from nettoyage import charger_donnees_propres
+from modele_ols import (preparer_donnees_ols, matrices_ols, ajuster_ols_creux, modele_additif_depuis_ols,
+                        categories_reference, ModeleOLSCompile, LIBELLE_CONSTANTE)
+from modele_compile import ModeleCompile
+from meilleurs_profils import meilleurs_profils
+from quantiles import SketchKLL, classer_top
+
 warnings.filterwarnings('ignore')
 
 # ====================================================================
@@ -16,86 +21,40 @@ warnings.filterwarnings('ignore')
 
 # NOTE IMPORTANTE : Ajustez ce chemin de fichier
 try:
-    df = pd.read_csv("C:/Users/babou/Downloads/AnimeProject/Anime/popular_anime.csv")
+    # Nettoyage commun (pipeline de nettoyage.py, résultat dans clean_anime.csv)
+    df = charger_donnees_propres("C:/Users/babou/Downloads/AnimeProject/Anime/popular_anime.csv")
 except FileNotFoundError:
     print("ERREUR FATALE: Fichier non trouvé. Veuillez vérifier et ajuster le chemin du fichier CSV.")
     exit()
 
-# [Clean Code - Identical to previous steps]
-df["genres"].fillna("Other", inplace=True)
-df["episodes"].fillna(1, inplace=True)
-colonne_a_drop = ['synopsis','trailer','producers']
-df = df.drop(columns=colonne_a_drop, errors='ignore')
-df['score'] = pd.to_numeric(df['score'], errors='coerce')
-df['scored_by'] = pd.to_numeric(df['scored_by'], errors='coerce')
-df = df.dropna(subset=['score', 'episodes', 'scored_by', 'rank',"rating","studios"])
-df = df.drop_duplicates()
-df.reset_index(drop=True, inplace=True)
 df = df[df['score'] <= 10.0].copy()
 
-def get_season_anime(date):
-    if pd.isna(date): return np.nan
-    try: date = pd.to_datetime(date)
-    except ValueError: return np.nan
-    month = date.month
-    season_index = (month - 1) // 3  
-    seasons = ["Winter", "Spring", "Summer", "Fall"]
-    return seasons[season_index]
-df["season_aired"] = df["aired_from"].apply(get_season_anime)
 df.dropna(subset=['season_aired'], inplace=True)
 
 # [Calcul du Seuil Top 10%]
-anime_classe_simple = df.sort_values(by='score', ascending=False)
-top_10_count = int(len(anime_classe_simple) * 0.10)
-SEUIL_SCORE_TOP_10 = anime_classe_simple.iloc[top_10_count-1]['score']
+# Sketch de quantiles des scores retenus au lieu d'un tri complet : le seuil est
+# le int(n * 10 %)-ième meilleur score, à l'erreur de rang du sketch près (~1 %)
+SKETCH_SCORES = SketchKLL(graine=0).ajouter(df['score'])
+SEUIL_SCORE_TOP_10 = SKETCH_SCORES.seuil_top(0.10)
 
 # ====================================================================
 # ÉTAPE 2 : ENCODAGE ET PRÉPARATION DES MATRICES X ET Y
 # ====================================================================
 
-# 1. Encodage Genres (Multi-étiquettes)
-df['genres_list'] = df['genres'].apply(lambda x: [g.strip() for g in x.split(',')] if isinstance(x, str) else [])
-mlb = MultiLabelBinarizer()
-genre_dummies = pd.DataFrame(mlb.fit_transform(df['genres_list']),
-                             columns=['Genre_' + genre for genre in mlb.classes_],
-                             index=df.index)
-df_encoded = pd.concat([df.reset_index(drop=True), genre_dummies], axis=1)
-
-# 2. Encodage variables simples
-df_encoded['first_studio'] = df_encoded['studios'].apply(lambda x: x.split(',')[0].strip() if isinstance(x, str) else np.nan)
-df_encoded.dropna(subset=['first_studio', 'season_aired'], inplace=True) 
-
-cols_to_encode = ['type', 'rating', 'season_aired', 'first_studio']
-
-df_encoded = pd.get_dummies(
-    df_encoded, 
-    columns=cols_to_encode, 
-    prefix=cols_to_encode, 
-    drop_first=True 
-)
-
-# 3. Définition et Nettoyage Final des Matrices X et Y
-Y = df_encoded['score']
-X = df_encoded.select_dtypes(include=[np.number])
-cols_a_exclure = ['score', 'scored_by', 'rank', 'episodes'] 
-X = X.drop(columns=cols_a_exclure, errors='ignore')
-
-data_final = pd.concat([X, Y], axis=1)
-data_final.dropna(inplace=True)
+# 1. Encodage Genres (multi-étiquettes) et premier studio
+df = preparer_donnees_ols(df)
 
-X = data_final.drop(columns=['score'], errors='ignore') 
-Y = data_final['score']
-
-X = X.loc[:, X.nunique() > 1] 
-X = sm.add_constant(X, prepend=False)
+# 2. Encodage creux (CSR) des genres, type, rating, saison et studio,
+#    sans lignes incomplètes ni colonnes constantes, constante en dernier
+X, Y, features = matrices_ols(df)
 
 # ====================================================================
 # ÉTAPE 3 : MODÉLISATION ET ENTRAÎNEMENT (OLS)
 # ====================================================================
 
-linear_model = sm.OLS(Y, X)
-result = linear_model.fit()
-MODEL_FEATURES = X.columns # Noms des colonnes finales du modèle
+# Équations normales accumulées par blocs : mêmes coefficients que sm.OLS
+result = ajuster_ols_creux(X, Y, features)
+MODEL_FEATURES = pd.Index(features) # Noms des colonnes finales du modèle
 COEFFICIENTS = result.params # Coefficients Beta pour l'analyse
 
 print("\n" + "="*70)
@@ -107,35 +66,28 @@ print("="*70)
 # ÉTAPE 4 : FONCTION DE PRÉDICTION ET EXPLICATION
 # ====================================================================
 
-def predire_et_expliquer(modele_resultat, caracteristiques_du_profil, model_features, seuil_top_10):
-    """Prédit le score, détermine le Top 10% et explique la note."""
-    
-    X_pred = pd.Series(0, index=model_features)
-    X_pred['const'] = 1 
-    
-    contributions = {}
-    
-    # Activer les caractéristiques du profil (X=1) et enregistrer les contributions
-    for feature in caracteristiques_du_profil:
-        if feature in X_pred.index:
-            X_pred[feature] = 1
-            # Contribution = Coefficient * 1 (car X=1)
-            contributions[feature] = modele_resultat.params[feature]
-        else:
-            contributions[f"Avertissement: {feature}"] = 0
-            
-    # Ajouter la contribution de la constante (Note de base)
-    contributions['Base Score (Intercept)'] = modele_resultat.params['const']
-    
-    # Calcul du score prédit (Score = sum(Beta_i * X_i))
-    score_predit = (X_pred * modele_resultat.params).sum()
-    score_predit = np.clip(score_predit, 1.0, 10.0) # Limite 0-10
+# Position de chaque feature dans les coefficients, calculée une seule fois
+MODELE_OLS = ModeleOLSCompile(COEFFICIENTS)
+
+def predire_et_expliquer_lot(modele_compile, profils, seuil_top_10):
+    """Prédit les scores d'un lot de profils, détermine le Top 10% et explique chaque note.
+
+    Score = produit de la matrice creuse des profils par les coefficients ;
+    les contributions ne portent que sur les features actives.
+    """
+    scores, contributions = modele_compile.predire(profils, avec_contributions=True)
     
-    # Décision Top 10%
-    est_top_10 = score_predit >= seuil_top_10
-    decision = "**OUI**" if est_top_10 else "**NON**"
+    # Décisions Top 10% pour tout le lot
+    est_top_10 = classer_top(scores, seuil_top_10)
+    decisions = np.where(est_top_10, "**OUI**", "**NON**")
     
-    return score_predit, decision, contributions
+    return scores, decisions, contributions
+
+def predire_et_expliquer(modele_compile, caracteristiques_du_profil, seuil_top_10):
+    """Prédit le score, détermine le Top 10% et explique la note d'un seul profil."""
+    scores, decisions, contributions = predire_et_expliquer_lot(
+        modele_compile, [caracteristiques_du_profil], seuil_top_10)
+    return scores[0], decisions[0], contributions[0]
 
 # ====================================================================
 # ÉTAPE 5 : INTERFACE UTILISATEUR ET DÉMONSTRATION
@@ -173,9 +125,8 @@ print(f"\nProfil choisi pour la démonstration : {profil_test_user}")
 # --- 2. Exécution du Modèle ---
 
 score_predit, decision_top10, contributions = predire_et_expliquer(
-    result, 
+    MODELE_OLS, 
     profil_test_user, 
-    MODEL_FEATURES, 
     SEUIL_SCORE_TOP_10
 )
 
@@ -207,4 +158,26 @@ print(contributions_df.to_markdown())
 # Conclusion de l'explication
 print("\n**Interprétation :**")
 print("Chaque ligne montre comment une caractéristique active (ou le score de base 'Intercept') tire la note vers le haut (+) ou vers le bas (-).")
-print(f"Le score de {score_predit:.2f} est la somme de l'Intercept ({contributions.get('Base Score (Intercept)', 0):.2f}) et des contributions de chaque Genre/Studio, etc.")
\ No newline at end of file
+print(f"Le score de {score_predit:.2f} est la somme de l'Intercept ({contributions.get(LIBELLE_CONSTANTE, 0):.2f}) et des contributions de chaque Genre/Studio, etc.")
+
+# --- 4. Le même profil avec chacun des studios du modèle (prédiction par lots) ---
+
+studios_modele = [col for col in MODEL_FEATURES if col.startswith('first_studio_')]
+autres_features = [f for f in profil_test_user if not f.startswith('first_studio_')]
+scores_studios, decisions_studios, _ = predire_et_expliquer_lot(
+    MODELE_OLS, [autres_features + [studio] for studio in studios_modele], SEUIL_SCORE_TOP_10)
+print(f"\n### Le profil avec chacun des {len(studios_modele)} studios : "
+      f"{(decisions_studios == '**OUI**').sum()} dans le Top 10%")
+for i in np.argsort(-scores_studios)[:5]:
+    print(f"{scores_studios[i]:.2f} | {studios_modele[i].replace('first_studio_', '')}")
+# ====================================================================
+# ÉTAPE 6 : MEILLEURS PROFILS SELON LES COEFFICIENTS OLS
+# ====================================================================
+
+# Un genre, un studio, un type, une classification et une saison par profil :
+# la note OLS est additive, les 5 meilleures combinaisons sont donc trouvées
+# sans énumérer le produit cartésien (les catégories de référence valent 0)
+print("\n### Les 5 profils les mieux notés par le modèle OLS")
+for r in meilleurs_profils(ModeleCompile(modele_additif_depuis_ols(COEFFICIENTS, categories_reference(df))), k=5):
+    profil = ", ".join(f"{dim}={valeur}" for dim, valeur in r['profil'].items() if valeur)
+    print(f"{r['score']:.2f} | {profil}")
@@ -0,0 +1,113 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from modele_ols import ajuster_ols_creux, charger_donnees_ols, encoder_creux, matrices_ols
+from script import charger_et_preparer_donnees, entrainer_modele, predire_notes_batch, premier_genre
+
+# ====================================================================
+# VALIDATION CROISÉE K-FOLD (MODÈLE ADDITIF ET OLS)
+# ====================================================================
+# Chaque pli est entraîné sur les k-1 autres et évalué sur les lignes qu'il
+# n'a jamais vues. Les plis tournent dans un pool de processus ; les données
+# sont transmises une seule fois à chaque worker via l'initialiseur.
+
+_DONNEES = {}
+
+
+def plis_kfold(n, k, graine=42):
+    """Indices de test de chaque pli, après une permutation aléatoire des lignes."""
+    permutation = np.random.default_rng(graine).permutation(n)
+    return np.array_split(permutation, k)
+
+
+def _initialiser_worker(df_additif, df_ols):
+    _DONNEES['additif'] = df_additif
+    _DONNEES['ols'] = df_ols
+
+
+def _erreurs(reelles, predites):
+    ecarts = reelles - predites
+    return {'n': len(ecarts), 'somme_abs': float(np.abs(ecarts).sum()), 'somme_carres': float(ecarts @ ecarts)}
+
+
+def _evaluer_pli_additif(test, min_count):
+    df = _DONNEES['additif']
+    entrainement = np.ones(len(df), dtype=bool)
+    entrainement[test] = False
+    modele = entrainer_modele(df[entrainement], min_count=min_count)
+
+    df_test = df.iloc[test]
+    predites = predire_notes_batch(modele, df_test['Studios'], df_test['Source'], df_test['Type'],
+                                   df_test['Rating'], premier_genre(df_test['Genres']), df_test['season_cleaned'])
+    return _erreurs(df_test['Score'].to_numpy(dtype=float), predites)
+
+
+def _evaluer_pli_ols(test):
+    df = _DONNEES['ols']
+    entrainement = np.ones(len(df), dtype=bool)
+    entrainement[test] = False
+    X, Y, features = matrices_ols(df[entrainement].reset_index(drop=True))
+    resultat = ajuster_ols_creux(X, Y, features)
+
+    df_test = df.iloc[test].dropna(subset=['score']).reset_index(drop=True)
+    X_test = encoder_creux(df_test, features)
+    predites = np.clip(X_test @ resultat.params.to_numpy(), 1.0, 10.0)
+    return _erreurs(df_test['score'].to_numpy(dtype=float), predites)
+
+
+def _evaluer(tache):
+    modele, min_count, test = tache
+    if modele == 'additif':
+        return _evaluer_pli_additif(test, min_count)
+    return _evaluer_pli_ols(test)
+
+
+def valider(df_additif=None, df_ols=None, k=5, min_counts=(2,), graine=42, workers=None):
+    """MAE / RMSE hors pli de chaque modèle (et de chaque min_count pour le modèle additif)."""
+    taches = []
+    if df_additif is not None:
+        for min_count in min_counts:
+            taches += [('additif', min_count, test) for test in plis_kfold(len(df_additif), k, graine)]
+    if df_ols is not None:
+        taches += [('ols', None, test) for test in plis_kfold(len(df_ols), k, graine)]
+    if not taches:
+        raise ValueError("Aucun jeu de données à valider.")
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_initialiser_worker,
+                             initargs=(df_additif, df_ols)) as pool:
+        resultats = list(pool.map(_evaluer, taches))
+
+    lignes = []
+    for (modele, min_count, _), erreurs in zip(taches, resultats):
+        lignes.append({'modele': modele, 'min_count': min_count, **erreurs})
+    plis = pd.DataFrame(lignes).groupby(['modele', 'min_count'], dropna=False)[['n', 'somme_abs', 'somme_carres']].sum()
+
+    rapport = pd.DataFrame({
+        'n': plis['n'],
+        'mae': plis['somme_abs'] / plis['n'],
+        'rmse': np.sqrt(plis['somme_carres'] / plis['n']),
+    })
+    rapport = rapport.reset_index()
+    rapport['min_count'] = rapport['min_count'].astype('Int64')
+    return rapport
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validation croisée des modèles de prédiction de score")
+    parser.add_argument('--csv-additif', default='anime-dataset-2023.csv')
+    parser.add_argument('--csv-ols', default='popular_anime.csv')
+    parser.add_argument('-k', type=int, default=5)
+    parser.add_argument('--min-count', type=int, nargs='+', default=[1, 2, 5, 10])
+    parser.add_argument('--graine', type=int, default=42)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    df_additif = charger_et_preparer_donnees(args.csv_additif) if os.path.exists(args.csv_additif) else None
+    df_ols = charger_donnees_ols(args.csv_ols) if os.path.exists(args.csv_ols) else None
+
+    rapport = valider(df_additif, df_ols, args.k, args.min_count, args.graine, args.workers)
+    print(rapport.to_string(index=False, float_format=lambda v: f"{v:.4f}"))